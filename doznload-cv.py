@@ -1,834 +1,930 @@
 import requests
 import os
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+from requests.adapters import HTTPAdapter
 
-def telecharger_fichiers(data):
+try:
+    import aiohttp
+except ImportError:  # Only needed for backend="asyncio"
+    aiohttp = None
+
+BASE_URL = "https://www.cantiquest.org/"
+DOWNLOAD_DIR = "downloads"
+CHUNK_SIZE = 64 * 1024
+MANIFEST_NAME = ".manifest.json"
+STORE_DIR = ".store"
+LINK_ATTEMPTS = 3  # Attempts at linking a name to its blob while other workers store the same content
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+CATALOGUE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cv_catalogue.jsonl")
+
+
+class HostLimiter:
+    """
+    Caps the number of requests in flight against any single host.
+
+    Args:
+        per_host_limit (int): Maximum simultaneous requests per host.
+    """
+
+    def __init__(self, per_host_limit):
+        self.per_host_limit = per_host_limit
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def slot(self, url):
+        """Returns the semaphore guarding the host of the given URL."""
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._semaphores[host]
+
+
+def build_session(pool_size):
+    """
+    Creates a keep-alive session whose connection pool can hold
+    `pool_size` sockets per host, so workers reuse connections.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def list_files(data, base_url, download_dir):
+    """
+    Expands the catalogue into (label, url, save_path) download jobs,
+    keeping the PDF-then-MIDI order of each entry. Absolute URLs in the
+    catalogue are used as they are, so job lists built for several hymnals
+    can be concatenated and downloaded in one run.
+    """
+    jobs = []
+    for item in data:
+        for key, label in (("pdfA4", "PDF"), ("instruMidi", "MIDI")):
+            path = item.get(key)
+            if path:
+                save_path = os.path.join(download_dir, os.path.basename(path))
+                jobs.append((label, urljoin(base_url, path), save_path))
+    return jobs
+
+
+class Manifest:
+    """
+    JSON record of every file fetched into a download directory: source URL,
+    size, SHA-256 and the ETag/Last-Modified validators the server sent.
+
+    Args:
+        path (str): Location of the manifest file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def lookup(self, file_name, save_path):
+        """
+        Returns the recorded entry if the file on disk still has the recorded
+        size, otherwise None.
+        """
+        with self._lock:
+            entry = self.entries.get(file_name)
+        if entry and os.path.exists(save_path) and os.path.getsize(save_path) == entry["size"]:
+            return entry
+        return None
+
+    def record(self, file_name, url, save_path, digest, headers):
+        with self._lock:
+            self.entries[file_name] = {
+                "url": url,
+                "size": os.path.getsize(save_path),
+                "sha256": digest,
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+            }
+
+    def save(self):
+        """Writes the manifest atomically next to the files it describes."""
+        with self._lock:
+            write_json_atomic(self.path, self.entries)
+
+
+class ContentStore:
+    """
+    Content-addressed blob store kept in `<download_dir>/.store`.
+
+    Every file is stored once under its SHA-256 (`.store/ab/abcd...`) and the
+    catalogue names in `download_dir` are hard links to those blobs, so
+    identical variants take the space of one file. `.store/index.json` maps
+    each name to its hash, for later stages that cache by content. Where
+    hard links are not available the blob is a copy and only the index
+    ties names to content.
+
+    Args:
+        download_dir (str): Directory holding the catalogue names.
+    """
+
+    def __init__(self, download_dir):
+        self.download_dir = download_dir
+        self.root = os.path.join(download_dir, STORE_DIR)
+        self.index_path = os.path.join(self.root, "index.json")
+        self._lock = threading.Lock()
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding="utf-8") as f:
+                self.index = json.load(f)
+
+    def blob_path(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def ingest(self, save_path, digest=None):
+        """
+        Stores the file at `save_path` and makes that name a link to the blob.
+        Files already linked to their indexed blob are not hashed again.
+
+        Returns:
+            str: The SHA-256 of the file.
+        """
+        file_name = os.path.basename(save_path)
+        with self._lock:
+            known = self.index.get(file_name)
+        if known and os.path.exists(self.blob_path(known)) and \
+                os.path.samefile(save_path, self.blob_path(known)):
+            return known
+
+        if digest is None:
+            digest = sha256_file(save_path)
+        blob = self.blob_path(digest)
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        for attempt in range(LINK_ATTEMPTS):
+            try:
+                if not os.path.exists(blob):
+                    os.link(save_path, blob)
+                elif not os.path.samefile(save_path, blob):
+                    # Replace the name by a link to the existing blob, atomically
+                    link_path = partial_path(save_path) + ".link"
+                    if os.path.lexists(link_path):
+                        os.remove(link_path)  # Left over by an interrupted run
+                    os.link(blob, link_path)
+                    os.replace(link_path, save_path)
+                break
+            except FileExistsError:
+                # Another worker stored the same content between the check and
+                # the link: try again, this time linking the name to its blob
+                continue
+            except OSError:
+                if not os.path.exists(blob):
+                    shutil.copyfile(save_path, blob)
+                break
+        else:
+            print(f"Could not link {file_name} to its stored copy {digest[:12]}: kept as a separate file")
+        with self._lock:
+            self.index[file_name] = digest
+        return digest
+
+    def prune(self):
+        """
+        Forgets names that are no longer in the download directory and
+        deletes the blobs nothing refers to any more.
+
+        Returns:
+            int: Number of blobs removed.
+        """
+        with self._lock:
+            self.index = {name: digest for name, digest in self.index.items()
+                          if os.path.exists(os.path.join(self.download_dir, name))}
+            referenced = set(self.index.values())
+        removed = 0
+        for directory, _, files in os.walk(self.root):
+            if directory == self.root:
+                continue
+            for name in files:
+                if name not in referenced:
+                    os.remove(os.path.join(directory, name))
+                    removed += 1
+        return removed
+
+    def save(self):
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            write_json_atomic(self.index_path, self.index)
+
+
+def write_json_atomic(path, data):
+    """Writes `data` as JSON to a temporary file and renames it over `path`."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".part")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def update_digest(digest, path, chunk_size=CHUNK_SIZE):
+    """Feeds the contents of a file into a hashlib object, in chunks."""
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest
+
+
+def sha256_file(path, chunk_size=CHUNK_SIZE):
+    """Returns the hex SHA-256 of a file, reading it in chunks."""
+    return update_digest(hashlib.sha256(), path, chunk_size).hexdigest()
+
+
+def partial_path(save_path):
+    """Returns the hidden path an interrupted download of `save_path` is kept at."""
+    directory, file_name = os.path.split(save_path)
+    return os.path.join(directory, f".{file_name}.part")
+
+
+def load_partial_validator(part_path):
+    """
+    Returns the ETag or Last-Modified recorded when a partial file was
+    started, or None. It is sent as If-Range so that a file which changed
+    on the server is downloaded again instead of being spliced.
+    """
+    try:
+        with open(part_path + ".json", encoding="utf-8") as f:
+            return json.load(f).get("validator")
+    except (OSError, ValueError):
+        return None
+
+
+def save_partial_validator(part_path, headers):
+    validator = headers.get("ETag") or headers.get("Last-Modified")
+    with open(part_path + ".json", "w", encoding="utf-8") as f:
+        json.dump({"validator": validator}, f)
+
+
+def discard_partial(part_path):
+    for path in (part_path, part_path + ".json"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def conditional_headers(entry):
+    """Builds If-None-Match / If-Modified-Since headers from a manifest entry."""
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def adopt_existing(session, url, save_path, manifest):
+    """
+    Adds a file that is already on disk but missing from the manifest, if a
+    HEAD request reports the same Content-Length. This lets a first
+    incremental run reuse an existing mirror without re-downloading it.
+
+    A matching size does not prove the content matches, so the entry is
+    recorded without the server's ETag/Last-Modified: the next run makes an
+    unconditional GET, replaces a stale file of the same size, and only then
+    records validators for later conditional requests.
+
+    Returns:
+        bool: True if the local file was adopted.
+    """
+    response = session.head(url, allow_redirects=True)
+    response.raise_for_status()
+    length = response.headers.get("Content-Length")
+    if length is None or int(length) != os.path.getsize(save_path):
+        return False
+    manifest.record(os.path.basename(save_path), url, save_path, sha256_file(save_path), {})
+    return True
+
+
+def download_file(session, label, url, save_path, chunk_size=CHUNK_SIZE, manifest=None,
+                  resume=False, transfer=None):
+    """
+    Streams one file through the shared session.
+
+    The body is written in `chunk_size` pieces to a temporary file next to
+    `save_path`, which is renamed into place only once complete. Memory use
+    does not depend on the file size, and an interrupted download never
+    leaves a truncated file under its final name.
+
+    With a `manifest`, the request is made conditional on the recorded
+    ETag/Last-Modified and a 304 answer leaves the local file untouched.
+
+    With `resume`, an interrupted download is kept as a hidden `.part` file
+    and the next attempt asks only for the missing bytes with a Range
+    request. A server that ignores Range answers 200 and the file is
+    downloaded again from the start.
+
+    Status, time to first byte and byte count are written into `transfer`
+    (see `new_transfer`) when one is given.
+
+    Returns:
+        bool: True if the file was saved or is already up to date,
+              False on a request error.
+    """
+    file_name = os.path.basename(save_path)
+    part_path = partial_path(save_path) if resume else None
+    if transfer is None:
+        transfer = new_transfer(url, save_path)
+    tmp_path = None
+    try:
+        headers = {}
+        if manifest is not None:
+            entry = manifest.lookup(file_name, save_path)
+            if entry:
+                headers = conditional_headers(entry)
+            elif os.path.exists(save_path) and adopt_existing(session, url, save_path, manifest):
+                print(f"Adopted existing file (checked on next run): {file_name}")
+                return True
+
+        offset = 0
+        if resume and os.path.exists(part_path):
+            offset = os.path.getsize(part_path)
+        if offset:
+            headers = {"Range": f"bytes={offset}-"}
+            validator = load_partial_validator(part_path)
+            if validator:
+                headers["If-Range"] = validator
+            print(f"Resuming {label} at byte {offset}: {url}")
+        else:
+            print(f"Downloading {label}: {url}")
+
+        with session.get(url, headers=headers, stream=True) as response:
+            transfer["status"] = response.status_code
+            transfer["ttfb"] = time.perf_counter() - transfer["started"]
+            if response.status_code == 304:
+                print(f"Up to date: {file_name}")
+                return True
+            if offset and (response.status_code == 416 or (
+                    response.status_code == 206
+                    and not response.headers.get("Content-Range", "").startswith(f"bytes {offset}-"))):
+                # The partial file no longer matches what the server has
+                discard_partial(part_path)
+                response.close()
+                transfer["retries"] += 1
+                return download_file(session, label, url, save_path, chunk_size, manifest, resume,
+                                     transfer)
+            response.raise_for_status()  # Raise an exception for bad status codes
+
+            digest = hashlib.sha256()
+            if resume:
+                tmp_path = part_path
+                if response.status_code == 206:
+                    update_digest(digest, part_path, chunk_size)
+                    mode = 'ab'
+                else:
+                    save_partial_validator(part_path, response.headers)
+                    mode = 'wb'
+                f = open(part_path, mode)
+            else:
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(save_path) or ".",
+                                                prefix=f".{file_name}.", suffix=".part")
+                f = os.fdopen(fd, 'wb')
+            with f:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    transfer["bytes"] += len(chunk)
+        os.replace(tmp_path, save_path)
+        tmp_path = None
+        if resume:
+            discard_partial(part_path)
+        if manifest is not None:
+            manifest.record(file_name, url, save_path, digest.hexdigest(), response.headers)
+        print(f"Successfully downloaded: {file_name}")
+        return True
+
+    except requests.exceptions.RequestException as e:
+        print(f"Error downloading {file_name}: {e}")
+        transfer["error"] = str(e)
+        return False
+
+    finally:
+        # A resumable partial file is kept for the next attempt
+        if tmp_path is not None and not resume and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def new_transfer(url, save_path):
+    """Returns the record a download function fills in for one file."""
+    return {
+        "file": os.path.basename(save_path),
+        "url": url,
+        "status": None,
+        "bytes": 0,
+        "ttfb": None,
+        "latency": None,
+        "retries": 0,
+        "ok": False,
+        "error": None,
+        "started": time.perf_counter(),
+    }
+
+
+class TransferMetrics:
+    """
+    Collects one record per file (bytes, latency, time to first byte,
+    retries, HTTP status) and the aggregate figures of the run.
+
+    Args:
+        total (int): Number of files the run will attempt.
+        progress (bool): Print a throughput / ETA / error-rate line to
+                         stderr each time a file completes.
+    """
+
+    def __init__(self, total, progress=False):
+        self.total = total
+        self.progress = progress
+        self.transfers = []
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, transfer, ok):
+        """Closes a record returned by `new_transfer` and adds it to the run."""
+        transfer["ok"] = bool(ok)
+        transfer["latency"] = time.perf_counter() - transfer.pop("started")
+        with self._lock:
+            self.transfers.append(transfer)
+            line = self.progress_line() if self.progress else None
+        if line:
+            print(line, file=sys.stderr, flush=True)
+
+    def progress_line(self):
+        done = len(self.transfers)
+        elapsed = time.perf_counter() - self.started
+        received = sum(t["bytes"] for t in self.transfers)
+        errors = sum(1 for t in self.transfers if not t["ok"])
+        eta = elapsed / done * (self.total - done) if done else 0.0
+        return (f"[{done}/{self.total}] {received / 1e6:.1f} MB, "
+                f"{received / 1e6 / elapsed if elapsed else 0.0:.2f} MB/s, "
+                f"ETA {eta:.0f}s, errors {errors / done:.1%}")
+
+    def summary(self):
+        """Returns the aggregate figures of the run as a dict."""
+        with self._lock:
+            transfers = list(self.transfers)
+        elapsed = time.perf_counter() - self.started
+        received = sum(t["bytes"] for t in transfers)
+        latencies = sorted(t["latency"] for t in transfers)
+        ttfbs = [t["ttfb"] for t in transfers if t["ttfb"] is not None]
+        statuses = {}
+        for t in transfers:
+            statuses[str(t["status"])] = statuses.get(str(t["status"]), 0) + 1
+
+        def percentile(values, q):
+            return values[min(len(values) - 1, int(q * len(values)))] if values else None
+
+        return {
+            "files": len(transfers),
+            "errors": sum(1 for t in transfers if not t["ok"]),
+            "bytes": received,
+            "elapsed": elapsed,
+            "throughput": received / elapsed if elapsed else 0.0,
+            "latency_p50": percentile(latencies, 0.5),
+            "latency_p95": percentile(latencies, 0.95),
+            "ttfb_mean": sum(ttfbs) / len(ttfbs) if ttfbs else None,
+            "retries": sum(t["retries"] for t in transfers),
+            "statuses": statuses,
+        }
+
+    def dump(self, path):
+        """Writes the summary and every per-file record as JSON."""
+        with self._lock:
+            transfers = list(self.transfers)
+        write_json_atomic(path, {"summary": self.summary(), "transfers": transfers})
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every coroutine of the asyncio backend.
+
+    Args:
+        rate (float): Requests allowed per second, across all hosts.
+        burst (int): Requests that may start back to back after an idle period.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """Exponential backoff with full jitter for the given retry attempt (0-based)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+async def adopt_existing_async(session, url, save_path, manifest):
+    """
+    asyncio counterpart of `adopt_existing`; the entry is likewise recorded
+    without validators, so the next run checks the file with a full GET.
+    """
+    async with session.head(url, allow_redirects=True) as response:
+        response.raise_for_status()
+        length = response.headers.get("Content-Length")
+    if length is None or int(length) != os.path.getsize(save_path):
+        return False
+    digest = await asyncio.to_thread(sha256_file, save_path)
+    manifest.record(os.path.basename(save_path), url, save_path, digest, {})
+    return True
+
+
+async def download_file_async(session, label, url, save_path, rate_limiter=None, retries=3,
+                              chunk_size=CHUNK_SIZE, manifest=None, transfer=None):
+    """
+    asyncio counterpart of `download_file`: streams one file to a temporary
+    file and renames it into place, honouring the manifest when one is given.
+    As in `download_file`, a file already on disk but missing from the
+    manifest is adopted when a HEAD request reports the same size.
+
+    Connection errors, timeouts and 429/5xx answers are retried up to
+    `retries` times with exponential backoff and jitter. Metrics go into
+    `transfer` as in `download_file`.
+
+    Returns:
+        bool: True if the file was saved or is already up to date,
+              False once the retries are exhausted.
+    """
+    file_name = os.path.basename(save_path)
+    if transfer is None:
+        transfer = new_transfer(url, save_path)
+    for attempt in range(retries + 1):
+        transfer["retries"] = attempt
+        tmp_path = None
+        try:
+            headers = {}
+            if manifest is not None:
+                entry = manifest.lookup(file_name, save_path)
+                if entry:
+                    headers = conditional_headers(entry)
+                elif os.path.exists(save_path):
+                    if rate_limiter is not None:
+                        await rate_limiter.acquire()
+                    if await adopt_existing_async(session, url, save_path, manifest):
+                        print(f"Adopted existing file (checked on next run): {file_name}")
+                        return True
+
+            if rate_limiter is not None:
+                await rate_limiter.acquire()
+            print(f"Downloading {label}: {url}")
+            async with session.get(url, headers=headers) as response:
+                transfer["status"] = response.status
+                transfer["ttfb"] = time.perf_counter() - transfer["started"]
+                if response.status == 304:
+                    print(f"Up to date: {file_name}")
+                    return True
+                response.raise_for_status()  # Raise an exception for bad status codes
+
+                digest = hashlib.sha256()
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(save_path) or ".",
+                                                prefix=f".{file_name}.", suffix=".part")
+                with os.fdopen(fd, 'wb') as f:
+                    async for chunk in response.content.iter_chunked(chunk_size):
+                        f.write(chunk)
+                        digest.update(chunk)
+                        transfer["bytes"] += len(chunk)
+            os.replace(tmp_path, save_path)
+            tmp_path = None
+            if manifest is not None:
+                manifest.record(file_name, url, save_path, digest.hexdigest(), response.headers)
+            print(f"Successfully downloaded: {file_name}")
+            return True
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            retryable = not isinstance(e, aiohttp.ClientResponseError) or e.status in RETRY_STATUSES
+            if not retryable or attempt == retries:
+                print(f"Error downloading {file_name}: {e}")
+                transfer["error"] = str(e)
+                return False
+            delay = backoff_delay(attempt)
+            print(f"Retrying {file_name} in {delay:.1f}s after: {e}")
+            await asyncio.sleep(delay)
+
+        finally:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+async def mirror_async(jobs, max_concurrency=100, per_host_limit=8, rate_limit=None,
+                       retries=3, incremental=False, dedupe=False, metrics=None):
+    """
+    Downloads a list of (label, url, save_path) jobs on a single event loop.
+
+    `max_concurrency` worker coroutines pull from a bounded queue, so job
+    lists covering several hymnals are fed in without scheduling every
+    request up front. The connector caps sockets per host and the optional
+    `rate_limit` (requests per second) applies to the whole run. With
+    `dedupe`, each download directory gets a `ContentStore`. Per-file
+    records are added to `metrics` (a `TransferMetrics`) when given.
+
+    Returns:
+        int: Number of files downloaded or already up to date.
+    """
+    if aiohttp is None:
+        raise ImportError("The asyncio backend needs aiohttp: pip install aiohttp")
+
+    manifests = {}
+    stores = {}
+    for _, _, save_path in jobs:
+        directory = os.path.dirname(save_path)
+        if incremental and directory not in manifests:
+            manifests[directory] = Manifest(os.path.join(directory, MANIFEST_NAME))
+        if dedupe and directory not in stores:
+            stores[directory] = ContentStore(directory)
+
+    rate_limiter = RateLimiter(rate_limit) if rate_limit else None
+    queue = asyncio.Queue(maxsize=2 * max_concurrency)
+    results = []
+
+    connector = aiohttp.TCPConnector(limit=max_concurrency, limit_per_host=per_host_limit)
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=60)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        async def worker():
+            while True:
+                label, url, save_path = await queue.get()
+                directory = os.path.dirname(save_path)
+                transfer = new_transfer(url, save_path)
+                ok = False
+                try:
+                    ok = await download_file_async(session, label, url, save_path, rate_limiter,
+                                                   retries, manifest=manifests.get(directory),
+                                                   transfer=transfer)
+                    if ok and directory in stores:
+                        await asyncio.to_thread(stores[directory].ingest, save_path)
+                except Exception as e:
+                    # Disk errors and the like fail this file only: a dead
+                    # worker would leave the queue undrained and the run stuck.
+                    print(f"Error saving {os.path.basename(save_path)}: {e}")
+                    transfer["error"] = str(e)
+                    ok = False
+                finally:
+                    if metrics is not None:
+                        metrics.record(transfer, ok)
+                    results.append(ok)
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(max(max_concurrency, 1))]
+        try:
+            for job in jobs:
+                await queue.put(job)
+            await queue.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            for manifest in manifests.values():
+                manifest.save()
+            for store in stores.values():
+                store.prune()
+                store.save()
+
+    return sum(results)
+
+
+def telecharger_fichiers(data, base_url=BASE_URL, download_dir=DOWNLOAD_DIR,
+                         max_workers=1, per_host_limit=4, incremental=False,
+                         resume=False, backend="threads", rate_limit=None, retries=3,
+                         dedupe=False, progress=False, metrics_path=None):
     """
     Downloads PDF and MIDI files from a list of URLs and saves them locally.
     
     Args:
         data (list): A list of dictionaries, where each dictionary contains
                      the 'pdfA4' and 'instruMidi' keys with file paths.
+        base_url (str): Site the catalogue paths are relative to. Point it at
+                        a local server to test without touching the real site.
+        download_dir (str): Directory where the files are saved.
+        max_workers (int): Number of download threads, or of worker coroutines
+                           with the asyncio backend. 1 keeps the original
+                           one-file-at-a-time behaviour.
+        per_host_limit (int): Maximum simultaneous requests to one host.
+        incremental (bool): Keep a manifest in `download_dir` and only fetch
+                            files the server reports as changed.
+        resume (bool): Keep interrupted downloads and continue them with
+                       HTTP Range requests on the next attempt. Threads only.
+        backend (str): "threads" or "asyncio" (needs aiohttp).
+        rate_limit (float): asyncio only, maximum requests per second.
+        retries (int): asyncio only, retries per file with exponential backoff.
+        dedupe (bool): Keep each distinct file once in a content-addressed
+                       store and hard-link the catalogue names to it.
+        progress (bool): Print a live throughput / ETA / error-rate line.
+        metrics_path (str): If set, write per-file and aggregate transfer
+                            metrics to this JSON file at the end of the run.
+
+    Returns:
+        int: Number of files downloaded or already up to date.
     """
-    base_url = "https://www.cantiquest.org/"
-    
     # Create a directory to store the files if it doesn't exist
-    download_dir = "downloads"
     if not os.path.exists(download_dir):
         os.makedirs(download_dir)
         print(f"Created directory: {download_dir}")
 
-    for item in data:
-        # Construct the full URL for the PDF file
-        pdf_path = item.get("pdfA4")
-        if pdf_path:
-            pdf_url = base_url + pdf_path
-            pdf_file_name = os.path.basename(pdf_path)
-            pdf_save_path = os.path.join(download_dir, pdf_file_name)
-            
-            try:
-                print(f"Downloading PDF: {pdf_url}")
-                response = requests.get(pdf_url)
-                response.raise_for_status()  # Raise an exception for bad status codes
-                
-                with open(pdf_save_path, 'wb') as f:
-                    f.write(response.content)
-                print(f"Successfully downloaded: {pdf_file_name}")
-                
-            except requests.exceptions.RequestException as e:
-                print(f"Error downloading {pdf_file_name}: {e}")
-
-        # Construct the full URL for the MIDI file
-        midi_path = item.get("instruMidi")
-        if midi_path:
-            midi_url = base_url + midi_path
-            midi_file_name = os.path.basename(midi_path)
-            midi_save_path = os.path.join(download_dir, midi_file_name)
-            
-            try:
-                print(f"Downloading MIDI: {midi_url}")
-                response = requests.get(midi_url)
-                response.raise_for_status()  # Raise an exception for bad status codes
-                
-                with open(midi_save_path, 'wb') as f:
-                    f.write(response.content)
-                print(f"Successfully downloaded: {midi_file_name}")
-                
-            except requests.exceptions.RequestException as e:
-                print(f"Error downloading {midi_file_name}: {e}")
-
-# Assuming your data is stored in a variable named 'cv_data'
-# For the purpose of this example, let's use a small sample from your JSON
-cv_data = [
-    
-    {
-        "numero": "5",
-        "titre": "Jésus, Jésus, seul nom",
-        "pdfA4": "CV/CV_005-Jesus_Jesus_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_005-polyinstru-Jesus_Jesus.mid"
-    },
-    {
-        "numero": "6",
-        "titre": "À Dieu soit la gloire",
-        "pdfA4": "CV/CV_006-A_Dieu_soit_la_gloire_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_006-polyinstru-A_Dieu_soit_la_gloire.mid"
-    },
-    {
-        "numero": "8",
-        "titre": "Le nom de Jésus est si doux",
-        "pdfA4": "CV/CV_008-Le_nom_de_Jesus_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_008-polyinstru-Le_nom_de_Jesus.mid"
-    },
-    {
-        "numero": "11",
-        "titre": "Adorable mystère",
-        "pdfA4": "CV/CV_011-Adorable_mystere_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_011-polyinstru-Adorable_mystere.mid"
-    },
-    {
-        "numero": "17",
-        "titre": "À Celui qui nous a lavés",
-        "pdfA4": "CV/CV_017-A_celui_qui_nous_a_laves_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_017-polyinstru-A_celui_qui_nous_a_laves.mid"
-    },
-    {
-        "numero": "18",
-        "titre": "Vers toi monte notre hommage",
-        "pdfA4": "CV/CV_018-Vers_toi_monte_notre_hommage_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_018-polyinstru-Vers_toi_monte_notre_hommage.mid"
-    },
-    {
-        "numero": "20",
-        "titre": "Oh! quel bonheur de le connaitre",
-        "pdfA4": "CV/CV_020-Oh_quel_bonheur_de_le_connaitre_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_020-polyinstru-Oh_quel_bonheur_de_le_connaitre.mid"
-    },
-    {
-        "numero": "22",
-        "titre": "Je l'ai trouvé le bonheur ineffable",
-        "pdfA4": "CV/CV_022-Je_l_ai_trouve_le_bonheur_ineffable_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_022-polyinstru-Je_l_ai_trouve_le_bonheur_ineffable.mid"
-    },
-    {
-        "numero": "24",
-        "titre": "Par tous les saints glorifié",
-        "pdfA4": "CV/CV_024-Par_tous_les_saints_glorifie_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_024-polyinstru-Par_tous_les_saints_glorifie.mid"
-    },
-    {
-        "numero": "26",
-        "titre": "Les rayons de l'amour divin",
-        "pdfA4": "CV/CV_026-Les_rayons_de_l_amour_divin_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_026-polyinstru-Les_rayons_de_l_amour_divin.mid"
-    },
-    {
-        "numero": "28",
-        "titre": "Oh! que toute la terre entonne",
-        "pdfA4": "CV/CV_028-Oh_que_toute_la_terre_entonne_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_028-polyinstru-Oh_que_toute_la_terre_entonne.mid"
-    },
-    {
-        "numero": "29",
-        "titre": "Rédempteur adorable",
-        "pdfA4": "CV/CV_029-Redempteur_adorable_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_029-polyinstru-Redempteur_adorable.mid"
-    },
-    {
-        "numero": "30",
-        "titre": "Ma richesse et ma gloire",
-        "pdfA4": "CV/CV_030-Ma_richesse_ma_gloire_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_030-polyinstru-Ma_richesse_ma_gloire.mid"
-    },
-    {
-        "numero": "34",
-        "titre": "Ah! Si ton sang, si ta mort, si ta vie",
-        "pdfA4": "CV/CV_034-Ah_si_ton_sang_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_034-polyinstru-Ah_si_ton_sang.mid"
-    },
-    {
-        "numero": "41",
-        "titre": "Roi couvert de blessures",
-        "pdfA4": "CV/CV_041-Roi_couvert_de_blessures_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_041-polyinstru-Roi_couvert_de_blessures.mid"
-    },
-    {
-        "numero": "42",
-        "titre": "Agneau de Dieu, Messager de la grâce",
-        "pdfA4": "CV/CV_042-Agneau_de_Dieu_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_042-polyinstru-Agneau_de_Dieu.mid"
-    },
-    {
-        "numero": "43",
-        "titre": "Jésus-Christ est ma sagesse",
-        "pdfA4": "CV/CV_043-Jesus_Christ_est_ma_sagesse_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_043-polyinstru-Jesus_Christ_est_ma_sagesse.mid"
-    },
-    {
-        "numero": "",
-        "titre": "Venez contempler au calvaire",
-        "pdfA4": "CV/CV_045a-Venez_contempler_au_Calvaire_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_045a-polyinstru-Venez_contempler_au_Calvaire.mid"
-    },
-    {
-        "numero": "46",
-        "titre": "Viens mon âme, et contemple",
-        "pdfA4": "CV/CV_046-Viens_mon_ame_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_046-polyinstru-Viens_mon_ame.mid"
-    },
-    {
-        "numero": "47",
-        "titre": "C'est toi Jésus, Pain de vie",
-        "pdfA4": "CV/CV_047-C_est_toi_Jesus_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_047-polyinstru-C_est_toi_Jesus.mid"
-    },
-    {
-        "numero": "57",
-        "titre": "Viens à la croix",
-        "pdfA4": "CV/CV_057-Viens_a_la_croix_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_057-polyinstru-Viens_a_la_croix.mid"
-    },
-    {
-        "numero": "70",
-        "titre": "Coeurs fatigués et chargés",
-        "pdfA4": "CV/CV_070-Coeurs_fatigues_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_070-polyinstru-Coeurs_fatigues.mid"
-    },
-    {
-        "numero": "71",
-        "titre": "Reviens!",
-        "pdfA4": "CV/CV_071-Reviens_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_071-polyinstru-Reviens.mid"
-    },
-    {
-        "numero": "74",
-        "titre": "Arrête, ô pécheur, arrête",
-        "pdfA4": "CV/CV_074-Arrete_o_pecheur_arrete_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_074-polyinstru-Arrete_o_pecheur_arrete.mid"
-    },
-    {
-        "numero": "75",
-        "titre": "Comme un phare sur la plage",
-        "pdfA4": "CV/CV_075-Comme_un_phare_sur_la_plage_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_075-polyinstru-Comme_un_phare_sur_la_plage.mid"
-    },
-    {
-        "numero": "77",
-        "titre": "Reviens à ton Père",
-        "pdfA4": "CV/CV_077-Reviens_a_ton_Pere_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_077-polyinstru-Reviens_a_ton_Pere.mid"
-    },
-    {
-        "numero": "79",
-        "titre": "Il est un roc séculaire",
-        "pdfA4": "CV/CV_079-Il_est_un_roc_seculaire_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_079-polyinstru-Il_est_un_roc_seculaire.mid"
-    },
-    {
-        "numero": "84",
-        "titre": "Nous voguons vers un beau rivage",
-        "pdfA4": "CV/CV_084-Nous_voguons_vers_un_beau_rivage_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_084-polyinstru-Nous_voguons_vers_un_beau_rivage.mid"
-    },
-    {
-        "numero": "86",
-        "titre": "Venez au Sauveur qui vous aime",
-        "pdfA4": "CV/CV_086-Venez_au_Sauveur_qui_vous_aime_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_086-polyinstru-Venez_au_Sauveur_qui_vous_aime.mid"
-    },
-    {
-        "numero": "87",
-        "titre": "C'est encore temps!",
-        "pdfA4": "CV/CV_087-Cest_encore_temps_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_087-polyinstru-Cest_encore_temps.mid"
-    },
-    {
-        "numero": "90",
-        "titre": "Viens! âme perdue",
-        "pdfA4": "CV/CV_090-Viens_ame_perdue_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_090-polyinstru-Viens_ame_perdue.mid"
-    },
-    {
-        "numero": "94",
-        "titre": "Par ce chemin solitaire",
-        "pdfA4": "CV/CV_094-Par_ce_chemin_solitaire_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_094-polyinstru-Par_ce_chemin_solitaire.mid"
-    },
-    {
-        "numero": "102",
-        "titre": "Viens au Père",
-        "pdfA4": "CV/CV_102-Viens_au_Pere_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_102-polyinstru-Viens_au_Pere.mid"
-    },
-    {
-        "numero": "104",
-        "titre": "Bientôt le Seigneur va venir",
-        "pdfA4": "CV/CV_104-Bientot_le_Seigneur_va_venir_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_104-polyinstru-Bientot_le_Seigneur_va_venir.mid"
-    },
-    {
-        "numero": "105",
-        "titre": "Pécheur, je voudrais te guérir",
-        "pdfA4": "CV/CV_105-Pecheur_je_voudrais_te_guerir_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_105-polyinstru-Pecheur_je_voudrais_te_guerir.mid"
-    },
-    {
-        "numero": "107",
-        "titre": "Une bonne nouvelle",
-        "pdfA4": "CV/CV_107-Une_bonne_nouvelle_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_107-polyinstru-Une_bonne_nouvelle.mid"
-    },
-    {
-        "numero": "108",
-        "titre": "Dis tout à Jésus",
-        "pdfA4": "CV/CV_108-Dis_tout_a_Jesus_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_108-polyinstru-Dis_tout_a_Jesus.mid"
-    },
-    {
-        "numero": "111",
-        "titre": "Publiez bien haut",
-        "pdfA4": "CV/CV_111-Publiez_bien_haut_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_111-polyinstru-Publiez_bien_haut.mid"
-    },
-    {
-        "numero": "112",
-        "titre": "Jesus frappe à votre porte, ouvrez aujourd'hui",
-        "pdfA4": "CV/CV_112-Jesus_frappe_a_votre_porte_ouvrez_aujourd_hui_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_112-polyinstru-Jesus_frappe_a_votre_porte_ouvrez_aujourd_hui.mid"
-    },
-    {
-        "numero": "115",
-        "titre": "Où cherchez-vous le bonheur?",
-        "pdfA4": "CV/CV_115-Ou_cherchez_vous_le_bonheur_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_115-polyinstru-Ou_cherchez_vous_le_bonheur.mid"
-    },
-    {
-        "numero": "120",
-        "titre": "Blanc, plus blanc que neige",
-        "pdfA4": "CV/CV_120-Jesus_par_ton_sang_precieux_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_120-polyinstru-Jesus_par_ton_sang_precieux.mid"
-    },
-    {
-        "numero": "122",
-        "titre": "Source féconde",
-        "pdfA4": "CV/CV_122-Source_feconde_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_122-polyinstru-Source_feconde.mid"
-    },
-    {
-        "numero": "126",
-        "titre": "Roc séculaire, frappé pour moi (cf. CJ 15)",
-        "pdfA4": "CV/CV_126-Roc_seculaire_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_126-polyinstru-Roc_seculaire.mid"
-    },
-    {
-        "numero": "127",
-        "titre": "Joie au ciel, le prodigue est de retour",
-        "pdfA4": "CV/CV_127-Joie_au_ciel_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_127-polyinstru-Joie_au_ciel.mid"
-    },
-    {
-        "numero": "128",
-        "titre": "Seigneur, ta grâce m'appelle",
-        "pdfA4": "CV/CV_128-Seigneur_ta_grace_m_appelle_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_128-polyinstru-Seigneur_ta_grace_m_appelle.mid"
-    },
-    {
-        "numero": "131",
-        "titre": "Miséricord insondable",
-        "pdfA4": "CV/CV_131-Misericorde_insondable_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_131-polyinstru-Misericorde_insondable.mid"
-    },
-    {
-        "numero": "132",
-        "titre": "Torrents d'amour et de grâce",
-        "pdfA4": "CV/CV_132-Torrents_d_amour_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_132-polyinstru-Torrents_d_amour.mid"
-    },
-    {
-        "numero": "135",
-        "titre": "Veux-tu briser du péché le pouvoir",
-        "pdfA4": "CV/CV_135-Veux_tu_briser_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_135-polyinstru-Veux_tu_briser.mid"
-    },
-    {
-        "numero": "143",
-        "titre": "Fraîches rosées",
-        "pdfA4": "CV/CV_143-Comme_une_terre_alteree_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_143-polyinstru-Comme_une_terre_alteree.mid"
-    },
-    {
-        "numero": "",
-        "titre": "Jésus, ta sainte présence",
-        "pdfA4": "CV/CV_147a-Jesus_ta_sainte_presence_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_147a-polyinstru-Jesus_ta_sainte_presence.mid"
-    },
-    {
-        "numero": "148",
-        "titre": "Jésus est au milieu de nous",
-        "pdfA4": "CV/CV_148-Jesus_est_au_milieu_de_nous_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_148-polyinstru-Jesus_est_au_milieu_de_nous.mid"
-    },
-    {
-        "numero": "",
-        "titre": "Toi qui disposes",
-        "pdfA4": "CV/CV_149a-Toi_qui_disposes_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_149a-polyinstru-Toi_qui_disposes.mid"
-    },
-    {
-        "numero": "161",
-        "titre": "Écoutez l'appel du Berger",
-        "pdfA4": "CV/CV_161-Ecoutez_l_appel_du_Berger_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_161-polyinstru-Ecoutez_l_appel_du_Berger.mid"
-    },
-    {
-        "numero": "162",
-        "titre": "Ah! que je ne sois pas",
-        "pdfA4": "CV/CV_162-Ah_que_je_ne_sois_pas_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_162-polyinstru-Ah_que_je_ne_sois_pas.mid"
-    },
-    {
-        "numero": "166",
-        "titre": "Qu'il fait bon à ton service",
-        "pdfA4": "CV/CV_166-Qu_il_fait_bon_a_ton_service_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_166-polyinstru-Qu_il_fait_bon_a_ton_service.mid"
-    },
-    {
-        "numero": "167",
-        "titre": "C'est mon joyeux service",
-        "pdfA4": "CV/CV_167-C_est_mon_joyeux_service_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_167-polyinstru-C_est_mon_joyeux_service.mid"
-    },
-    {
-        "numero": "",
-        "titre": "Entre tes mains j'abandonne (original anglais)",
-        "pdfA4": "CV/CV_172a-Entre_tes_mains_j_abandonne_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_172a-polyinstru-Entre_tes_mains_j_abandonne.mid"
-    },
-    {
-        "numero": "174",
-        "titre": "Seul refuge de mon âme",
-        "pdfA4": "CV/CV_174-Seul_refuge_de_mon_ame_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_174-polyinstru-Seul_refuge_de_mon_ame.mid"
-    },
-    {
-        "numero": "175",
-        "titre": "L'amour de Jésus Christ nous presse",
-        "pdfA4": "CV/CV_175-L_amour_de_Jesus-Christ_nous_presse_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_175-polyinstru-L_amour_de_Jesus-Christ_nous_presse.mid"
-    },
-    {
-        "numero": "180",
-        "titre": "La voix du Seigneur m'appelle",
-        "pdfA4": "CV/CV_180-La_voix_du_Seigneur_m_appelle_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_180-polyinstru-La_voix_du_Seigneur_m_appelle.mid"
-    },
-    {
-        "numero": "184",
-        "titre": "Viens, mon âme te réclame",
-        "pdfA4": "CV/CV_184-Viens_mon_ame_te_reclame_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_184-polyinstru-Viens_mon_ame_te_reclame.mid"
-    },
-    {
-        "numero": "187",
-        "titre": "C'est un rempart que notre Dieu",
-        "pdfA4": "CV/CV_187-C_est_un_rempart_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_187-polyinstru-C_est_un_rempart.mid"
-    },
-    {
-        "numero": "188",
-        "titre": "Plus que vainqueur",
-        "pdfA4": "CV/CV_188-Plus_que_vainqueurs_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_188-polyinstru-Plus_que_vainqueurs.mid"
-    },
-    {
-        "numero": "191",
-        "titre": "Jusqu'à ta venue",
-        "pdfA4": "CV/CV_191-Jusqu_a_ta_venue_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_191-polyinstru-Jusqu_a_ta_venue.mid"
-    },
-    {
-        "numero": "193",
-        "titre": "Le signal de la victoire",
-        "pdfA4": "CV/CV_193-Le_signal_de_la_victoire_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_193-polyinstru-Le_signal_de_la_victoire.mid"
-    },
-    {
-        "numero": "194",
-        "titre": "Sans attendre",
-        "pdfA4": "CV/CV_194-Sans_attendre_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_194-polyinstru-Sans_attendre.mid"
-    },
-    {
-        "numero": "200",
-        "titre": "Veille toujours",
-        "pdfA4": "CV/CV_200-Veille_toujours_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_200-polyinstru-Veille_toujours.mid"
-    },
-    {
-        "numero": "201",
-        "titre": "À celui qui sera vainqueur",
-        "pdfA4": "CV/CV_201-A_celui_qui_sera_vainqueur_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_201-polyinstru-A_celui_qui_sera_vainqueur.mid"
-    },
-    {
-        "numero": "202",
-        "titre": "Vous qui gardez les murs",
-        "pdfA4": "CV/CV_202-Vous_qui_gardez_les_murs_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_202-polyinstru-Vous_qui_gardez_les_murs.mid"
-    },
-    {
-        "numero": "203",
-        "titre": "Sentinelle vigilante",
-        "pdfA4": "CV/CV_203-mono-piano-Sentinelle_vigilante_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_203-polyinstru-Sentinelle_vigilante.mid"
-    },
-    {
-        "numero": "",
-        "titre": "Debout, sainte cohorte!",
-        "pdfA4": "CV/CV_204a-mono-piano-Debout_sainte_cohorte_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_204a-polyinstru-Debout_sainte_cohorte.mid"
-    },
-    {
-        "numero": "205",
-        "titre": "Travaillons et luttons",
-        "pdfA4": "CV/CV_205-Travaillons_et_luttons_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_205-polyinstru-Travaillons_et_luttons.mid"
-    },
-    {
-        "numero": "207",
-        "titre": "Maître, entends-tu la tempête",
-        "pdfA4": "CV/CV_207-Maitre_entends-tu_la_tempete_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_207-polyinstru-Maitre_entends-tu_la_tempete.mid"
-    },
-    {
-        "numero": "208",
-        "titre": "Compte les bienfaits de Dieu",
-        "pdfA4": "CV/CV_208-Compte_les_bienfaits_de_Dieu_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_208-polyinstru-Compte_les_bienfaits_de_Dieu.mid"
-    },
-    {
-        "numero": "210",
-        "titre": "Une nacelle en silence",
-        "pdfA4": "CV/CV_210-Une_nacelle_en_silence_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_210-polyinstru-Une_nacelle_en_silence.mid"
-    },
-    {
-        "numero": "211",
-        "titre": "Tout est bien",
-        "pdfA4": "CV/CV_211-Tout_est_bien_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_211-polyinstru-Tout_est_bien.mid"
-    },
-    {
-        "numero": "213",
-        "titre": "Invoque-moi",
-        "pdfA4": "CV/CV_213-Invoque-moi_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_213-polyinstru-Invoque-moi.mid"
-    },
-    {
-        "numero": "",
-        "titre": "Oh! quelle paix parfaite",
-        "pdfA4": "CV/CV_215a-Oh_quelle_paix_parfaite_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_215a-polyinstru-Oh_quelle_paix_parfaite.mid"
-    },
-    {
-        "numero": "219",
-        "titre": "Dans ce triste monde",
-        "pdfA4": "CV/CV_219-Dans_ce_triste_monde_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_219-polyinstru-Dans_ce_triste_monde.mid"
-    },
-    {
-        "numero": "221",
-        "titre": "Tiens dans ta main, ta main fidèle et forte (original anglais HWR 373)",
-        "pdfA4": "CV/CV_221-mono-piano-Tiens_dans_ta_main_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_221-polyinstru-Tiens_dans_ta_main.mid"
-    },
-    {
-        "numero": "222",
-        "titre": "Ton fidèle amour",
-        "pdfA4": "CV/CV_222-Ton_fidele_amour_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_222-polyinstru-Ton_fidele_amour.mid"
-    },
-    {
-        "numero": "223",
-        "titre": "À Jésus je m'abandonne (= ATG 329)",
-        "pdfA4": "CV/CV_223-A_Jesus_je_m_abandonne_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_223-polyinstru-A_Jesus_je_m_abandonne.mid"
-    },
-    {
-        "numero": "224",
-        "titre": "Comme un fleuve immense",
-        "pdfA4": "CV/CV_224-Comme_un_fleuve_immense_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_224-polyinstru-Comme_un_fleuve_immense.mid"
-    },
-    {
-        "numero": "226",
-        "titre": "Ne crains pas",
-        "pdfA4": "CV/CV_226-Ne_crains_rien_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_226-polyinstru-Ne_crains_rien.mid"
-    },
-    {
-        "numero": "230",
-        "titre": "Un chrétien je croyais être",
-        "pdfA4": "CV/CV_230-Un_chretien_je_croyait_etre_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_230-polyinstru-Un_chretien_je_croyait_etre.mid"
-    },
-    {
-        "numero": "233",
-        "titre": "Je ne sais pourquoi Dieu dans sa grâce.. mais je sais...",
-        "pdfA4": "CV/CV_233-mono-piano-Je_sais_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_233-polyinstru-Je_sais.mid"
-    },
-    {
-        "numero": "234",
-        "titre": "Quel ami fidèle et tendre! (original anglais)",
-        "pdfA4": "CV/CV_234-Quel_ami_fidele_et_tendre_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_234-polyinstru-Quel_ami_fidele_et_tendre.mid"
-    },
-    {
-        "numero": "236",
-        "titre": "Oh! jour béni, jour de victoire",
-        "pdfA4": "CV/CV_236-O_jour_beni_jour_de_victoire_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_236-polyinstru-O_jour_beni_jour_de_victoire.mid"
-    },
-    {
-        "numero": "237",
-        "titre": "Aux jours d'angoisse et de souffrance",
-        "pdfA4": "CV/CV_237-Aux_jours_d_angoisse_et_de_souffrance_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_237-polyinstru-Aux_jours_d_angoisse_et_de_souffrance.mid"
-    },
-    {
-        "numero": "238",
-        "titre": "Oui, selon ta promesse",
-        "pdfA4": "CV/CV_238-Oui_selon_ta_promesse_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_238-polyinstru-Oui_selon_ta_promesse.mid"
-    },
-    {
-        "numero": "240",
-        "titre": "Un seul pas à la fois",
-        "pdfA4": "CV/CV_240-Un_seul_pas_a_la_fois_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_240-polyinstru-Un_seul_pas_a_la_fois.mid"
-    },
-    {
-        "numero": "241",
-        "titre": "Saisis ma main craintive",
-        "pdfA4": "CV/CV_241-Saisis_ma_main_craintive_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_241-polyinstru-Saisis_ma_main_craintive.mid"
-    },
-    {
-        "numero": "243",
-        "titre": "Quel repos céleste",
-        "pdfA4": "CV/CV_243-mono-piano-Quel_repos_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_243-polyinstru-Quel_repos.mid"
-    },
-    {
-        "numero": "246",
-        "titre": "C'est à l'ombre de tes ailes qu'est le vrai repos",
-        "pdfA4": "CV/CV_246-A_lombre_de_tes_ailes_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_246-polyinstru-A_lombre_de_tes_ailes.mid"
-    },
-    {
-        "numero": "249",
-        "titre": "J'ai soif de ta présence",
-        "pdfA4": "CV/CV_249-J_ai_soif_de_ta_presence_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_249-polyinstru-J_ai_soif_de_ta_presence.mid"
-    },
-    {
-        "numero": "251",
-        "titre": "Ici pleurer et souffrir",
-        "pdfA4": "CV/CV_251-mono-piano-Ici_pleurer_et_souffrir_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_251-polyinstru-Ici_pleurer_et_souffrir.mid"
-    },
-    {
-        "numero": "252",
-        "titre": "Voir mon Sauveur face à face",
-        "pdfA4": "CV/CV_252-Voir_mon_Sauveur_face_a_face_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_252-polyinstru-Voir_mon_Sauveur_face_a_face.mid"
-    },
-    {
-        "numero": "253",
-        "titre": "La trompette a retenti",
-        "pdfA4": "CV/CV_253-La_trompette_a_retenti_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_253-polyinstru-La_trompette_a_retenti.mid"
-    },
-    {
-        "numero": "254",
-        "titre": "Il va venir le Seigneur que j'adore",
-        "pdfA4": "CV/CV_254-Il_va_venir_le_Seigneur_que_jadore_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_254-polyinstru-Il_va_venir_le_Seigneur_que_jadore.mid"
-    },
-    {
-        "numero": "257",
-        "titre": "Je ne sais pas le jour",
-        "pdfA4": "CV/CV_257-Je_ne_sais_pas_le_jour_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_257-polyinstru-Je_ne_sais_pas_le_jour.mid"
-    },
-    {
-        "numero": "261",
-        "titre": "Nombreux comme le sable des plages",
-        "pdfA4": "CV/CV_261-Nombreux_comme_le_sable_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_261-polyinstru-Nombreux_comme_le_sable.mid"
-    },
-    {
-        "numero": "264",
-        "titre": "Avec allégresse",
-        "pdfA4": "CV/CV_264-Avec_allegresse_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_264-polyinstru-Avec_allegresse.mid"
-    },
-    {
-        "numero": "265",
-        "titre": "Vers le ciel",
-        "pdfA4": "CV/CV_265-Vers_le_ciel_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_265-polyinstru-Vers_le_ciel.mid"
-    },
-    {
-        "numero": "268",
-        "titre": "Pèlerin sur cette terre",
-        "pdfA4": "CV/CV_268-Pelerin_sur_cette_terre_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_268-polyinstru-Pelerin_sur_cette_terre.mid"
-    },
-    {
-        "numero": "272",
-        "titre": "Connais-tu cette cité",
-        "pdfA4": "CV/CV_272-Connais_tu_cette_cite_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_272-polyinstru-Connais_tu_cette_cite-soprano.mid"
-    },
-    {
-        "numero": "273",
-        "titre": "Contempler mon Dieu sur son trône",
-        "pdfA4": "CV/CV_273-Contempler_mon_Dieu_sur_son_trone_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_273-polyinstru-Contempler_mon_Dieu_sur_son_trone.mid"
-    },
-    {
-        "numero": "274",
-        "titre": "Au ciel est la maison du Père",
-        "pdfA4": "CV/CV_274-Au_ciel_est_la_maison_du_Pere_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_274-polyinstru-Au_ciel_est_la_maison_du_Pere.mid"
-    },
-    {
-        "numero": "275",
-        "titre": "Nous attendons le Sauveur glorieux",
-        "pdfA4": "CV/CV_275-Nous_attendons_le_Sauveur_glorieux_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_275-polyinstru-Nous_attendons_le_Sauveur_glorieux.mid"
-    },
-    {
-        "numero": "279",
-        "titre": "Béni soit le lien",
-        "pdfA4": "CV/CV_279-Beni_soit_le_lien_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_279-polyinstru-Beni_soit_le_lien.mid"
-    },
-    {
-        "numero": "286",
-        "titre": "Chant d'adieu",
-        "pdfA4": "CV/CV_286-Chant_d_adieu_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_286-polyinstru-Chant_d_adieu.mid"
-    },
-    {
-        "numero": "288",
-        "titre": "Le chant du réveil",
-        "pdfA4": "CV/CV_288-Le_Chant_du_Reveil_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_288-polyinstru-Le_Chant_du_Reveil.mid"
-    },
-    {
-        "numero": "290",
-        "titre": "Christ est ma portion",
-        "pdfA4": "CV/CV_290-Christ_est_ma_portion_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_290-polyinstru-Christ_est_ma_portion.mid"
-    },
-    {
-        "numero": "292",
-        "titre": "Suivez, suivez l'Agneau",
-        "pdfA4": "CV/CV_292-Suivez_l_Agneau_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_292-polyinstru-Suivez_l_Agneau.mid"
-    },
-    {
-        "numero": "293",
-        "titre": "Tout joyeux, bénissons le Seigneur",
-        "pdfA4": "CV/CV_293-Tout_joyeux_benissons_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_293-polyinstru-Tout_joyeux_benissons.mid"
-    },
-    {
-        "numero": "294",
-        "titre": "Je suis petit, mais que m'importe",
-        "pdfA4": "CV/CV_294-Je_suis_petit_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_294-polyinstru-Je_suis_petit.mid"
-    },
-    {
-        "numero": "295",
-        "titre": "Nul enfant n'est trop petit pour la route étroite",
-        "pdfA4": "CV/CV_295-Nul_enfant_nest_trop_petit_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_295-polyinstru-Nul_enfant_nest_trop_petit.mid"
-    },
-    {
-        "numero": "298",
-        "titre": "Bientôt Jésus va nous prendre",
-        "pdfA4": "CV/CV_298-Bientot_Jesus_va_nous_prendre_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_298-polyinstru-Bientot_Jesus_va_nous_prendre.mid"
-    },
-    {
-        "numero": "299",
-        "titre": "Je suis la lumière",
-        "pdfA4": "CV/CV_299-Je_suis_la_lumiere_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_299-polyinstru-Je_suis_la_lumiere.mid"
-    },
-    {
-        "numero": "301",
-        "titre": "Bon Sauveur, Berger fidèle",
-        "pdfA4": "CV/CV_301-Bon_Sauveur_berger_fidele_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_301-polyinstru-Bon_Sauveur_berger_fidele.mid"
-    },
-    {
-        "numero": "302",
-        "titre": "Le Seigneur m'aime",
-        "pdfA4": "CV/CV_302-Le_Seigneur_m_aime_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_302-polyinstru-Le_Seigneur_m_aime.mid"
-    },
-    {
-        "numero": "303",
-        "titre": "Sous le sang, le précieux sang",
-        "pdfA4": "CV/CV_303-Sous_le_sang_le_precieux_sang_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_303-polyinstru-Sous_le_sang_le_precieux_sang.mid"
-    },
-    {
-        "numero": "304",
-        "titre": "Jésus quitta le trône de son Père",
-        "pdfA4": "CV/CV_304-Jesus_quitta_le_trone_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_304-polyinstru-Jesus_quitta_le_trone.mid"
-    },
-    {
-        "numero": "305",
-        "titre": "Comme un rayon de soleil",
-        "pdfA4": "CV/CV_305-Rayon_de_soleil_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_305-polyinstru-Rayon_de_soleil.mid"
-    },
-    {
-        "numero": "306",
-        "titre": "Chaque jour de ma vie",
-        "pdfA4": "CV/CV_306-Chaque_jour_de_ma_vie_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_306-polyinstru-Chaque_jour_de_ma_vie.mid"
-    },
-    {
-        "numero": "307",
-        "titre": "Il est un pays magnifique",
-        "pdfA4": "CV/CV_307-Il_est_un_pays_magnifique_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_307-polyinstru-Il_est_un_pays_magnifique.mid"
-    },
-    {
-        "numero": "309",
-        "titre": "Jésus ne change pas",
-        "pdfA4": "CV/CV_309-Jesus_ne_change_pas_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_309-polyinstru-Jesus_ne_change_pas.mid"
-    },
-    {
-        "numero": "310",
-        "titre": "David n'avait rien que sa frone",
-        "pdfA4": "CV/CV_310-David_n_avait_rien_que_sa_fronde_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_310-polyinstru-David_n_avait_rien_que_sa_fronde.mid"
-    },
-    {
-        "numero": "311",
-        "titre": "Prière de l'enfant à son coucher",
-        "pdfA4": "CV/CV_311-priere_de_lenfant_a_son_coucher_A4-avecMusique.pdf",
-        "instruMidi": "CV/CV_311-polyinstru-priere_de_lenfant_a_son_coucher.mid"
-    }
-]
+    jobs = list_files(data, base_url, download_dir)
+    metrics = TransferMetrics(len(jobs), progress=progress)
+
+    try:
+        if backend == "asyncio":
+            if resume:
+                raise ValueError("resume is only supported by the threads backend")
+            return asyncio.run(mirror_async(jobs, max_concurrency=max_workers,
+                                            per_host_limit=per_host_limit, rate_limit=rate_limit,
+                                            retries=retries, incremental=incremental,
+                                            dedupe=dedupe, metrics=metrics))
+        if backend != "threads":
+            raise ValueError(f"Unknown backend: {backend}")
+        return _download_threaded(jobs, download_dir, max_workers, per_host_limit,
+                                  incremental, resume, dedupe, metrics)
+    finally:
+        if metrics.transfers:
+            summary = metrics.summary()
+            print(f"Done: {summary['files'] - summary['errors']}/{summary['files']} files, "
+                  f"{summary['bytes'] / 1e6:.1f} MB in {summary['elapsed']:.1f}s")
+        if metrics_path:
+            metrics.dump(metrics_path)
+            print(f"Metrics written to: {metrics_path}")
+
+
+def _download_threaded(jobs, download_dir, max_workers, per_host_limit, incremental, resume,
+                       dedupe, metrics):
+    """Runs the job list on the thread pool; see `telecharger_fichiers`."""
+    limiter = HostLimiter(per_host_limit)
+    manifest = Manifest(os.path.join(download_dir, MANIFEST_NAME)) if incremental else None
+    store = ContentStore(download_dir) if dedupe else None
+
+    with build_session(max(per_host_limit, 1)) as session:
+        def run(job):
+            label, url, save_path = job
+            with limiter.slot(url):
+                transfer = new_transfer(url, save_path)
+                ok = download_file(session, label, url, save_path, manifest=manifest,
+                                   resume=resume, transfer=transfer)
+            metrics.record(transfer, ok)
+            if ok and store is not None:
+                entry = manifest.lookup(os.path.basename(save_path), save_path) if manifest else None
+                store.ingest(save_path, entry["sha256"] if entry else None)
+            return ok
+
+        try:
+            if max_workers <= 1:
+                results = [run(job) for job in jobs]
+            else:
+                with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                    results = list(pool.map(run, jobs))
+        finally:
+            if manifest is not None:
+                manifest.save()
+            if store is not None:
+                store.prune()
+                store.save()
+
+    return sum(results)
+
+
+class Catalogue:
+    """
+    The hymn catalogue, read from a JSON Lines file (one entry per line with
+    'numero', 'titre', 'pdfA4' and 'instruMidi') the first time it is used.
+
+    Entries are indexed by `numero` and by the words of their normalized
+    `titre`, so single-hymn and title lookups do not scan the whole list.
+
+    Args:
+        path (str): Location of the JSON Lines catalogue.
+    """
+
+    def __init__(self, path=CATALOGUE_PATH):
+        self.path = path
+        self._entries = None
+        self._by_numero = {}
+        self._by_word = {}
+
+    def _load(self):
+        if self._entries is not None:
+            return self._entries
+        entries = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entries.append(json.loads(line))
+        for position, entry in enumerate(entries):
+            if entry.get("numero"):
+                self._by_numero[entry["numero"]] = entry
+            for word in set(normalize_title(entry.get("titre", "")).split()):
+                self._by_word.setdefault(word, []).append(position)
+        self._entries = entries
+        return entries
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def by_numero(self, numero):
+        """Returns the entry with this hymn number, or None."""
+        self._load()
+        return self._by_numero.get(str(numero))
+
+    def search(self, query):
+        """
+        Returns the entries whose title contains every word of `query`,
+        ignoring case, accents and punctuation, in catalogue order.
+        """
+        entries = self._load()
+        words = normalize_title(query).split()
+        if not words:
+            return []
+        positions = set(self._by_word.get(words[0], ()))
+        for word in words[1:]:
+            positions.intersection_update(self._by_word.get(word, ()))
+        return [entries[position] for position in sorted(positions)]
+
+
+def normalize_title(text):
+    """Lower-cases a title and drops accents and punctuation: "Jésus, Jésus" -> "jesus jesus"."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+cv_data = Catalogue()
+
+def main():
+    """
+    Command-line entry point: downloads the `cv_data` catalogue, or only the
+    hymns selected with --numero / --titre.
+    """
+    parser = argparse.ArgumentParser(description="Download the CV hymn PDFs and MIDI files.")
+    parser.add_argument("--numero", action="append", default=[],
+                        help="download only this hymn number (repeatable)")
+    parser.add_argument("--titre",
+                        help="download only the hymns whose title contains these words")
+    parser.add_argument("--base-url", default=BASE_URL,
+                        help="site the catalogue paths are relative to")
+    parser.add_argument("--dest", default=DOWNLOAD_DIR,
+                        help="directory where the files are saved")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of concurrent downloads (default: 1)")
+    parser.add_argument("--per-host", type=int, default=4,
+                        help="maximum simultaneous requests per host (default: 4)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="skip files that are unchanged since the last run")
+    parser.add_argument("--resume", action="store_true",
+                        help="keep interrupted downloads and resume them with Range requests")
+    parser.add_argument("--backend", choices=("threads", "asyncio"), default="threads",
+                        help="download engine (default: threads)")
+    parser.add_argument("--rate-limit", type=float, default=None,
+                        help="asyncio backend: maximum requests per second")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="asyncio backend: retries per file (default: 3)")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="store identical files once and hard-link the catalogue names")
+    parser.add_argument("--progress", action="store_true",
+                        help="print live throughput, ETA and error rate to stderr")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="write per-file transfer metrics to this JSON file")
+    args = parser.parse_args()
+
+    selection = cv_data
+    if args.numero or args.titre:
+        selection = [entry for entry in (cv_data.by_numero(n) for n in args.numero) if entry]
+        if args.titre:
+            selection += [entry for entry in cv_data.search(args.titre) if entry not in selection]
+
+    telecharger_fichiers(selection, base_url=args.base_url, download_dir=args.dest,
+                         max_workers=args.workers, per_host_limit=args.per_host,
+                         incremental=args.incremental, resume=args.resume,
+                         backend=args.backend, rate_limit=args.rate_limit, retries=args.retries,
+                         dedupe=args.dedupe, progress=args.progress, metrics_path=args.metrics)
+
 
-# Uncomment the line below to run the function with your data
-telecharger_fichiers(cv_data)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,575 @@
+# -*- coding: utf-8 -*-
+"""
+Mesures de performance des étapes de parsepdf.py sur le PDF de la chorale de Kolwezi.
+
+Usage :
+    python bench_parsepdf.py [--pages 1-10] [--repetitions 5]
+    python bench_parsepdf.py --suite [--resultats bench_results.json]
+                             [--reference bench_baseline.json] [--seuil 1.25]
+                             [--ecrire-reference]
+
+Chaque mesure compare l'implémentation actuelle à la version de référence
+(boucle Python d'origine) et vérifie que les deux donnent le même résultat.
+
+Avec --suite, chaque étape du pipeline (extraction, classification, association,
+JSON, HTML) est mesurée sur des jeux fixes : le PDF de Kolwezi, quelques PDF de
+downloads/ et des pages synthétiques 10x et 100x plus denses. Le temps, le pic
+de mémoire (RSS) et le débit en éléments par seconde sont écrits dans un fichier
+de résultats (par défaut dans le dossier temporaire, hors de l'arbre des
+sources) ; le script échoue si une étape est plus lente que la référence
+enregistrée au-delà du seuil, ou s'il n'y a pas de référence.
+
+La référence bench_baseline.json, versionnée à côté de ce script, a été mesurée
+sur la machine d'intégration. Les temps dépendant de la machine, la régénérer
+avant de comparer sur un autre poste (et la versionner si elle remplace
+celle d'intégration) :
+    python bench_parsepdf.py --suite --ecrire-reference
+"""
+
+import argparse
+import contextlib
+import functools
+import glob
+import io
+import json
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import pandas as pd
+from PyPDF2 import PdfReader
+
+import parsepdf
+
+DOSSIER = os.path.dirname(os.path.abspath(__file__))
+PDF_KOLWEZI = os.path.join(DOSSIER, "CHORALE KOLWEZI NOUVELLE FARDE REVISEE01.pdf")
+PDF_DOWNLOADS = os.path.join(DOSSIER, os.pardir, "downloads", "*.pdf")
+RESULTATS_DEFAUT = os.path.join(tempfile.gettempdir(), "bench_parsepdf_results.json")
+REFERENCE_DEFAUT = os.path.join(DOSSIER, "bench_baseline.json")
+
+# Jeux de mesure de la suite : pages du PDF de Kolwezi, nombre de PDF de
+# downloads/ (première page de chacun) et facteurs de densité des pages synthétiques
+SUITE_PAGES_KOLWEZI = [1, 2, 3, 4, 5]
+SUITE_NB_DOWNLOADS = 3
+SUITE_FACTEURS_SYNTHETIQUES = (10, 100)
+SEUIL_REGRESSION = 1.25
+# Écart absolu en dessous duquel un ralentissement est attribué au bruit de mesure
+ECART_MINIMAL_S = 0.005
+
+
+def merge_glyphs_reference(df: pd.DataFrame) -> pd.DataFrame:
+    """Fusion glyphes -> mots telle qu'écrite à l'origine (boucle sur df.loc)."""
+    processed_data = []
+    if not df.empty:
+        current_x = df.loc[0, 'x']
+        current_y = df.loc[0, 'y']
+        current_text = df.loc[0, 'text']
+
+        for i in range(1, len(df)):
+            next_x = df.loc[i, 'x']
+            next_y = df.loc[i, 'y']
+            next_text = df.loc[i, 'text']
+
+            if abs(next_x - current_x) < 20 and abs(next_y - current_y) < 5:
+                current_text += next_text
+                current_x = next_x
+            else:
+                processed_data.append({'text': current_text, 'x': current_x, 'y': current_y})
+                current_x = next_x
+                current_y = next_y
+                current_text = next_text
+
+        processed_data.append({'text': current_text, 'x': current_x, 'y': current_y})
+    return pd.DataFrame(processed_data)
+
+
+def classify_reference(df: pd.DataFrame) -> pd.DataFrame:
+    """Classification telle qu'écrite à l'origine (filtre df[y == ...] par ligne)."""
+    lines_df = df.groupby('y').agg({
+        'text': ' '.join,
+        'x': 'first'
+    }).reset_index().sort_values(by='y', ascending=False)
+    
+    new_data = []
+    
+    note_id_counter = 0
+    rhythm_id_counter = 0
+    octave_id_counter = 0
+
+    note_line_regex = r'[drmfslt-]'
+    octave_line_regex = r'^[0-9│\s]+$' # Ligne ne contenant que des chiffres, '|' et espaces
+
+    for _, line in lines_df.iterrows():
+        line_text = line['text']
+        y_coord = line['y']
+        
+        line_type = 'lyric'
+        if re.search(note_line_regex, line_text, re.IGNORECASE):
+            line_type = 'note'
+        elif re.search(octave_line_regex, line_text):
+            line_type = 'octave'
+
+        # Pour les lignes de paroles, on les ajoute telles quelles
+        if line_type == 'lyric':
+            new_data.append({
+                'text': line_text,
+                'x': line['x'],
+                'y': y_coord,
+                'type': 'lyric',
+                'id': ''
+            })
+        else:
+            # Pour les lignes de notes ou d'octave, on analyse chaque mot
+            line_elements = df[df['y'] == y_coord].sort_values(by='x').to_dict('records')
+            
+            note_regex = r'[drmfslt-]'  # Les notes solfa
+            octave_regex = r'[│0-9]'    # Les chiffres sont des octaves
+            rhythm_regex = r'[:.,|]'    # Les symboles de rythme
+
+            combined_regex = f"({octave_regex}|{note_regex}|{rhythm_regex})"
+            
+            for elem in line_elements:
+                text_to_process = elem['text'].strip()
+                
+                if not text_to_process:
+                    continue
+
+                # On ne découpe que les lignes de notes/octave
+                if line_type == 'note':
+                    matches = list(re.finditer(combined_regex, text_to_process, re.IGNORECASE))
+                    if matches:
+                        last_pos = 0
+                        for match in matches:
+                            preceding_text = text_to_process[last_pos:match.start()].strip()
+                            if preceding_text:
+                                # Le texte avant une note est considéré comme lyric
+                                new_data.append({
+                                    'text': preceding_text,
+                                    'x': elem['x'],
+                                    'y': elem['y'],
+                                    'type': 'lyric',
+                                    'id': ''
+                                })
+                            
+                            matched_text = match.group(0)
+                            
+                            if re.search(note_regex, matched_text, re.IGNORECASE) or matched_text == '-':
+                                note_id_counter += 1
+                                new_data.append({
+                                    'text': matched_text,
+                                    'x': elem['x'],
+                                    'y': elem['y'],
+                                    'type': 'note',
+                                    'id': f"note_{note_id_counter}"
+                                })
+                            elif re.search(rhythm_regex, matched_text):
+                                rhythm_id_counter += 1
+                                new_data.append({
+                                    'text': matched_text,
+                                    'x': elem['x'],
+                                    'y': elem['y'],
+                                    'type': 'rhythm',
+                                    'id': f"rhythm_{rhythm_id_counter}"
+                                })
+                            else: # Fallback to lyric
+                                new_data.append({
+                                    'text': matched_text,
+                                    'x': elem['x'],
+                                    'y': elem['y'],
+                                    'type': 'lyric',
+                                    'id': ''
+                                })
+                            
+                            last_pos = match.end()
+
+                        remaining_text = text_to_process[last_pos:].strip()
+                        if remaining_text:
+                            new_data.append({
+                                'text': remaining_text,
+                                'x': elem['x'],
+                                'y': elem['y'],
+                                'type': 'lyric',
+                                'id': ''
+                            })
+                    else:
+                         new_data.append({
+                            'text': text_to_process,
+                            'x': elem['x'],
+                            'y': elem['y'],
+                            'type': 'lyric',
+                            'id': ''
+                        })
+                
+                elif line_type == 'octave':
+                    octave_id_counter += 1
+                    new_data.append({
+                        'text': text_to_process,
+                        'x': elem['x'],
+                        'y': elem['y'],
+                        'type': 'octave',
+                        'id': f"octave_{octave_id_counter}"
+                    })
+
+    df_final = pd.DataFrame(new_data)
+    return df_final
+
+
+def associate_symbols_reference(df: pd.DataFrame) -> pd.DataFrame:
+    """Association symboles -> notes telle qu'écrite à l'origine (parcours O(N×M))."""
+    df_copy = df.copy()
+    df_copy['associated_id'] = None
+    notes = df_copy[df_copy['type'] == 'note'].to_dict('records')
+
+    for index, row in df_copy.iterrows():
+        if row['type'] in ['rhythm', 'continuation']:
+            closest_note = None
+            min_dist_x = float('inf')
+            for note in notes:
+                if note['y'] == row['y'] and note['x'] < row['x']:
+                    dist_x = row['x'] - note['x']
+                    if dist_x < min_dist_x:
+                        min_dist_x = dist_x
+                        closest_note = note
+            if closest_note:
+                df_copy.loc[index, 'associated_id'] = closest_note['id']
+
+        elif row['type'] == 'octave':
+            closest_note = None
+            min_dist_y = float('inf')
+            for note in notes:
+                dist_y = abs(row['y'] - note['y'])
+                if dist_y < min_dist_y:
+                    min_dist_y = dist_y
+                    closest_note = note
+            if closest_note:
+                df_copy.loc[index, 'associated_id'] = closest_note['id']
+    return df_copy
+
+
+def quietly(fonction, argument):
+    """Appelle une étape du pipeline sans ses messages de progression."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fonction(argument)
+
+
+def best_time(fonction, argument, repetitions: int) -> float:
+    """Meilleur temps (en secondes) sur plusieurs exécutions."""
+    meilleur = float('inf')
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repetitions):
+            debut = time.perf_counter()
+            fonction(argument)
+            meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur
+
+
+def bench_merge_glyphs(glyph_tables, repetitions: int):
+    """Compare merge_glyphs à la boucle d'origine, page par page."""
+    print("--- Fusion des glyphes (merge_glyphs) ---")
+    total_ref = total_new = 0.0
+    for page_num, glyphes in glyph_tables:
+        attendu = merge_glyphs_reference(glyphes)
+        obtenu = parsepdf.merge_glyphs(glyphes)
+        if not attendu.equals(obtenu):
+            raise AssertionError(f"merge_glyphs diffère de la référence sur la page {page_num}")
+        t_ref = best_time(merge_glyphs_reference, glyphes, repetitions)
+        t_new = best_time(parsepdf.merge_glyphs, glyphes, repetitions)
+        total_ref += t_ref
+        total_new += t_new
+        print(f"page {page_num:3d} : {len(glyphes):5d} glyphes  "
+              f"boucle {t_ref * 1000:8.2f} ms  vectorisé {t_new * 1000:7.2f} ms  "
+              f"x{t_ref / t_new:6.1f}")
+    print(f"total : boucle {total_ref * 1000:.1f} ms, vectorisé {total_new * 1000:.1f} ms, "
+          f"x{total_ref / total_new:.1f}")
+
+
+def bench_classify(merged_pages, repetitions: int):
+    """Débit de classify_and_annotate_text, en éléments produits par seconde."""
+    print("--- Classification (classify_and_annotate_text) ---")
+    total_elements = 0
+    total_ref = total_new = 0.0
+    for page_num, mots in merged_pages:
+        attendu = classify_reference(mots)
+        obtenu = quietly(parsepdf.classify_and_annotate_text, mots)
+        if not attendu.equals(obtenu):
+            raise AssertionError(f"classify_and_annotate_text diffère de la référence sur la page {page_num}")
+        t_ref = best_time(classify_reference, mots, repetitions)
+        t_new = best_time(parsepdf.classify_and_annotate_text, mots, repetitions)
+        total_elements += len(obtenu)
+        total_ref += t_ref
+        total_new += t_new
+        print(f"page {page_num:3d} : {len(obtenu):5d} éléments  "
+              f"origine {len(obtenu) / t_ref:10.0f} él/s  tokeniseur {len(obtenu) / t_new:10.0f} él/s  "
+              f"x{t_ref / t_new:5.1f}")
+    print(f"total : origine {total_elements / total_ref:.0f} él/s, "
+          f"tokeniseur {total_elements / total_new:.0f} él/s, x{total_ref / total_new:.1f}")
+
+
+def bench_associate(classified_pages, repetitions: int):
+    """Compare associate_symbols_to_notes au parcours d'origine, page par page."""
+    print("--- Association symboles -> notes (associate_symbols_to_notes) ---")
+    total_ref = total_new = 0.0
+    for page_num, classe in classified_pages:
+        attendu = associate_symbols_reference(classe)
+        obtenu = quietly(parsepdf.associate_symbols_to_notes, classe)
+        if not attendu.equals(obtenu):
+            raise AssertionError(f"associate_symbols_to_notes diffère de la référence sur la page {page_num}")
+        t_ref = best_time(associate_symbols_reference, classe, 1)
+        t_new = best_time(parsepdf.associate_symbols_to_notes, classe, repetitions)
+        total_ref += t_ref
+        total_new += t_new
+        print(f"page {page_num:3d} : {len(classe):5d} éléments  "
+              f"parcours {t_ref * 1000:8.1f} ms  index {t_new * 1000:7.2f} ms  "
+              f"x{t_ref / t_new:6.1f}")
+    print(f"total : parcours {total_ref * 1000:.1f} ms, index {total_new * 1000:.1f} ms, "
+          f"x{total_ref / total_new:.1f}")
+
+
+def bench_extractors(pdf_path: str, pages, repetitions: int):
+    """
+    Compare les extracteurs de glyphes disponibles (EXTRACTORS) sur les mêmes
+    pages : temps d'extraction, débit en glyphes par seconde, et nombre de
+    signes d'octave après classification (que la taille des glyphes affine).
+    """
+    print("--- Extraction des glyphes, par extracteur ---")
+    for nom, extracteur in sorted(parsepdf.EXTRACTORS.items()):
+        try:
+            source = extracteur.open(pdf_path)
+        except ImportError as e:
+            print(f"{nom:8s} : ignoré ({e})")
+            continue
+        numeros = parsepdf.resolve_pages(pages, extracteur.page_count(source))
+        total = 0.0
+        glyphes = octaves = 0
+        for page_num in numeros:
+            total += best_time(functools.partial(extracteur.glyphs, source), page_num, repetitions)
+            table = extracteur.glyphs(source, page_num)
+            glyphes += len(table)
+            mots = parsepdf.merge_glyph_table(table)
+            if not mots.empty:
+                options = extracteur.options_etapes.get('classification', {})
+                octaves += int((parsepdf.classify_elements(mots, **options).type
+                                == parsepdf.TYPE_OCTAVE).sum())
+        print(f"{nom:8s} : {len(numeros)} pages en {total * 1000:8.1f} ms  "
+              f"({total * 1000 / max(len(numeros), 1):6.1f} ms/page, {glyphes / total:9.0f} glyphes/s, "
+              f"{octaves} octaves)")
+
+
+def reset_peak_rss():
+    """Remet à zéro le pic de mémoire du processus (Linux uniquement)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_mb() -> float:
+    """Pic de mémoire résidente du processus, en Mo (depuis reset_peak_rss sous Linux)."""
+    try:
+        with open("/proc/self/status") as f:
+            for ligne in f:
+                if ligne.startswith("VmHWM:"):
+                    return int(ligne.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return float('nan')
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pic / (1024 * 1024) if sys.platform == "darwin" else pic / 1024
+
+
+def measure_stage(fonction, repetitions: int) -> dict:
+    """
+    Exécute `fonction()` plusieurs fois sans ses messages : meilleur temps,
+    pic de RSS et dernier résultat.
+    """
+    reset_peak_rss()
+    meilleur = float('inf')
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repetitions):
+            debut = time.perf_counter()
+            resultat = fonction()
+            meilleur = min(meilleur, time.perf_counter() - debut)
+    return {"wall_s": meilleur, "peak_rss_mb": round(peak_rss_mb(), 1), "resultat": resultat}
+
+
+def synthetic_page(mots: pd.DataFrame, facteur: int) -> pd.DataFrame:
+    """
+    Page synthétique `facteur` fois plus dense : les lignes de `mots` recopiées
+    les unes sous les autres, chaque copie décalée sous la précédente.
+    """
+    hauteur = mots['y'].max() - mots['y'].min() + 20
+    copies = [mots.assign(y=mots['y'] - k * hauteur) for k in range(facteur)]
+    return pd.concat(copies, ignore_index=True)
+
+
+def suite_fixtures() -> list:
+    """
+    Jeux de la suite : (nom, chemin du PDF ou None, numéro de page, mots fusionnés).
+    Les pages synthétiques n'ont pas de PDF, leur extraction n'est pas mesurée.
+    """
+    fixtures = []
+    sources = [("kolwezi", PDF_KOLWEZI, page_num) for page_num in SUITE_PAGES_KOLWEZI]
+    for chemin in sorted(glob.glob(PDF_DOWNLOADS))[:SUITE_NB_DOWNLOADS]:
+        sources.append((os.path.splitext(os.path.basename(chemin))[0], chemin, 1))
+    for nom, chemin, page_num in sources:
+        if not os.path.exists(chemin):
+            print(f"{nom} : PDF introuvable, ignoré")
+            continue
+        mots = quietly(lambda p: parsepdf.extract_text_with_coordinates(chemin, p), page_num)
+        if not mots.empty:
+            fixtures.append((f"{nom}/p{page_num}", chemin, page_num, mots))
+    if fixtures:
+        base = fixtures[0][3]
+        for facteur in SUITE_FACTEURS_SYNTHETIQUES:
+            fixtures.append((f"synthetique/x{facteur}", None, None, synthetic_page(base, facteur)))
+    return fixtures
+
+
+def run_suite(repetitions: int) -> dict:
+    """Mesure chaque étape du pipeline sur chaque jeu ; renvoie {"jeu/étape": mesures}."""
+    resultats = {}
+    with tempfile.TemporaryDirectory() as dossier:
+        sortie_json = os.path.join(dossier, "page.json")
+        sortie_html = os.path.join(dossier, "page.html")
+        for nom, chemin, page_num, mots in suite_fixtures():
+            etapes = []
+            if chemin is not None:
+                etapes.append(("extraction",
+                               lambda: parsepdf.extract_text_with_coordinates(chemin, page_num)))
+            etapes.append(("classification", lambda: parsepdf.classify_and_annotate_text(mots)))
+            mesures = {}
+            for etape, fonction in etapes:
+                mesures[etape] = measure_stage(fonction, repetitions)
+            classe = mesures["classification"]["resultat"]
+            mesures["association"] = measure_stage(
+                lambda: parsepdf.associate_symbols_to_notes(classe), repetitions)
+            final = mesures["association"]["resultat"]
+            mesures["json"] = measure_stage(
+                lambda: parsepdf.generate_json_from_dataframe(final, nom, sortie_json), repetitions)
+            mesures["html"] = measure_stage(
+                lambda: parsepdf.generate_html_from_dataframe(final, nom, sortie_html), repetitions)
+            for etape, mesure in mesures.items():
+                mesure.pop("resultat")
+                mesure["elements"] = len(mots) if etape == "extraction" else len(final)
+                mesure["elements_per_s"] = round(mesure["elements"] / mesure["wall_s"])
+                resultats[f"{nom}/{etape}"] = mesure
+                print(f"{nom:45s} {etape:15s} {mesure['wall_s'] * 1000:9.2f} ms  "
+                      f"{mesure['elements']:7d} él  {mesure['elements_per_s']:10d} él/s  "
+                      f"RSS {mesure['peak_rss_mb']:7.1f} Mo")
+    return resultats
+
+
+def write_results(resultats: dict, chemin: str):
+    """Écrit les mesures de la suite avec le contexte d'exécution."""
+    contenu = {
+        "python": platform.python_version(),
+        "plateforme": platform.platform(),
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "resultats": resultats,
+    }
+    with open(chemin, "w", encoding="utf-8") as f:
+        json.dump(contenu, f, ensure_ascii=False, indent=2)
+    print(f"Résultats écrits dans '{chemin}'.")
+
+
+def find_regressions(resultats: dict, reference: dict, seuil: float,
+                     ecart_minimal: float = ECART_MINIMAL_S) -> list:
+    """
+    Mesures plus lentes que la référence d'un facteur supérieur à `seuil` et
+    d'au moins `ecart_minimal` secondes (les étapes de quelques millisecondes
+    varient trop d'une exécution à l'autre pour être jugées au seul facteur).
+    """
+    regressions = []
+    for cle, mesure in resultats.items():
+        ancienne = reference.get(cle)
+        if ancienne and mesure["wall_s"] > seuil * ancienne["wall_s"] \
+                and mesure["wall_s"] - ancienne["wall_s"] >= ecart_minimal:
+            regressions.append((cle, ancienne["wall_s"], mesure["wall_s"]))
+    return regressions
+
+
+def main_suite(args) -> int:
+    """Exécute la suite, écrit les résultats et les compare à la référence."""
+    print("--- Suite de mesures par étape ---")
+    resultats = run_suite(args.repetitions)
+    write_results(resultats, args.resultats)
+    if args.ecrire_reference:
+        write_results(resultats, args.reference)
+        return 0
+    if not os.path.exists(args.reference):
+        print(f"Pas de référence '{args.reference}' : relancer avec --ecrire-reference pour l'enregistrer.")
+        return 1
+    with open(args.reference, encoding="utf-8") as f:
+        contenu = json.load(f)
+    if contenu.get("plateforme") != platform.platform() or contenu.get("python") != platform.python_version():
+        print(f"Attention : référence mesurée sur {contenu.get('plateforme')} (Python {contenu.get('python')}), "
+              "les écarts peuvent venir de la machine.")
+    reference = contenu["resultats"]
+    regressions = find_regressions(resultats, reference, args.seuil)
+    for cle, avant, apres in regressions:
+        print(f"RÉGRESSION {cle} : {avant * 1000:.2f} ms -> {apres * 1000:.2f} ms (x{apres / avant:.2f})")
+    if regressions:
+        print(f"{len(regressions)} étape(s) au-delà du seuil x{args.seuil}.")
+        return 1
+    print(f"Aucune régression au-delà du seuil x{args.seuil}.")
+    return 0
+
+
+def load_glyph_tables(pdf_path: str, pages) -> list:
+    reader = PdfReader(pdf_path)
+    tables = []
+    for page_num in parsepdf.resolve_pages(pages, len(reader.pages)):
+        glyphes = parsepdf.extract_glyphs(reader.pages[page_num - 1])
+        if not glyphes.empty:
+            tables.append((page_num, glyphes))
+    return tables
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de parsepdf.py")
+    parser.add_argument("--pdf", default=PDF_KOLWEZI, help="PDF de référence")
+    parser.add_argument("--pages", type=parsepdf.parse_page_ranges, default="1-10",
+                        help="pages mesurées (défaut : 1-10)")
+    parser.add_argument("--repetitions", type=int, default=5,
+                        help="exécutions par mesure, le meilleur temps est retenu")
+    parser.add_argument("--suite", action="store_true",
+                        help="mesurer chaque étape sur les jeux fixes et comparer à la référence")
+    parser.add_argument("--resultats", default=RESULTATS_DEFAUT,
+                        help="fichier de résultats de la suite (défaut : "
+                             "bench_parsepdf_results.json dans le dossier temporaire)")
+    parser.add_argument("--reference", default=REFERENCE_DEFAUT,
+                        help="résultats de référence (défaut : bench_baseline.json)")
+    parser.add_argument("--seuil", type=float, default=SEUIL_REGRESSION,
+                        help="facteur de ralentissement toléré par étape (défaut : 1.25)")
+    parser.add_argument("--ecrire-reference", action="store_true",
+                        help="enregistrer les résultats de la suite comme nouvelle référence")
+    args = parser.parse_args()
+
+    if args.suite:
+        sys.exit(main_suite(args))
+
+    bench_extractors(args.pdf, args.pages, args.repetitions)
+
+    glyph_tables = load_glyph_tables(args.pdf, args.pages)
+    bench_merge_glyphs(glyph_tables, args.repetitions)
+
+    merged = [(page_num, parsepdf.merge_glyphs(glyphes)) for page_num, glyphes in glyph_tables]
+    bench_classify(merged, args.repetitions)
+
+    classified = [(page_num, quietly(parsepdf.classify_and_annotate_text, mots))
+                  for page_num, mots in merged]
+    bench_associate(classified, args.repetitions)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,15 +12,52 @@ Ce script a été mis à jour pour :
     le décalage des symboles et des flèches pour lier les notes.
 4.  Générer un fichier JSON avec la même structure que le code initial, mais avec une gestion améliorée.
 5.  Prendre en compte la position relative des signes d'octave (ligne supérieure ou inférieure).
+6.  Écrire directement une partition MusicXML à quatre voix (SATB), en flux (option --musicxml).
+7.  Écrire un fichier MIDI standard, une piste par voix (option --midi).
+8.  Mesurer chaque étape, page par page, dans un rapport JSON (option --profil).
+9.  Écrire une visionneuse légère, HTML et données séparées (option --visionneuse).
 """
 
 # Importation des bibliothèques nécessaires
 from PyPDF2 import PdfReader
 import pandas as pd
 import os
+import sys
+import glob
+import argparse
 import json
+import gzip
+import contextlib
+import cProfile
+import pstats
+import time
+import tracemalloc
+import hashlib
 import re
+import inspect
+import functools
+import itertools
+import shutil
+import struct
+import tempfile
+from urllib.parse import quote
+from xml.sax.saxutils import escape
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import pymupdf
+except ImportError:  # Seulement nécessaire pour l'extracteur "pymupdf"
+    pymupdf = None
+
+# Version de l'extraction des glyphes, par extracteur : à incrémenter quand
+# extract_glyph_table (ou extract_glyph_table_pymupdf) change, pour invalider
+# les entrées du cache disque.
+EXTRACTOR_VERSION = "pypdf2-1"
+PYMUPDF_EXTRACTOR_VERSION = "pymupdf-1"
+DEFAULT_EXTRACTOR = "pypdf2"
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "parsepdf")
+DEFAULT_CACHE_SIZE = 512 * 1024 * 1024
 
 # --- Dictionnaires de mapping pour la conversion ---
 
@@ -35,6 +72,537 @@ RHYTHM_TO_DURATION = {
     ',': {'duration': 16, 'type': 'sixteenth'}
 }
 
+# Voix SATB : (identifiant de partie, nom, octave du doh, clef (signe, ligne, octave-change)).
+# Une page présente les voix en systèmes de 4 lignes de notes : la k-ième ligne
+# de notes de la page appartient à la voix k % 4.
+SATB_VOICES = (
+    ('P1', 'Soprano', 4, ('G', 2, 0)),
+    ('P2', 'Alto', 4, ('G', 2, 0)),
+    ('P3', 'Tenor', 3, ('G', 2, -1)),
+    ('P4', 'Bass', 3, ('F', 4, 0)),
+)
+
+# Tonalité annoncée dans l'en-tête, ex. "Doh is Bb" (espaces retirés)
+KEY_RE = re.compile(r'(?i:doh?is)([A-G])([b#♭♯]?)')
+STEP_LETTERS = 'CDEFGAB'
+LETTER_SEMITONES = {'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11}
+# Armure (nombre de quintes) d'une tonalité majeure, par hauteur de la tonique
+KEY_FIFTHS = {0: 0, 7: 1, 2: 2, 9: 3, 4: 4, 11: 5, 6: 6, 5: -1, 10: -2, 3: -3, 8: -4, 1: -5}
+# Altération chromatique écrite après la syllabe : "fe" (dièse), "ta" (bémol)
+SOLFA_ALTERATIONS = {'e': 1, 'a': -1}
+# Signes de prolongation de la note précédente
+SOLFA_CONTINUATIONS = {'-', '‒', '–'}
+# Nombre de mots de paroles toléré dans une ligne de musique
+MUSIC_LINE_MAX_LYRICS = 2
+# Largeur moyenne d'un caractère de notes, pour situer chaque note dans son mot
+SOLFA_CHAR_WIDTH = 6
+
+# Divisions MusicXML par temps (noire) : multiple de 2, 3 et 4 pour les demi-temps,
+# quarts de temps et triolets du solfa
+MUSICXML_DIVISIONS = 24
+MUSICXML_NOTE_TYPES = {
+    96: ('whole', 0), 72: ('half', 1), 48: ('half', 0), 36: ('quarter', 1),
+    24: ('quarter', 0), 18: ('eighth', 1), 12: ('eighth', 0), 9: ('16th', 1),
+    6: ('16th', 0), 3: ('32nd', 0),
+}
+
+# Visionneuse (voir write_viewer) : marge autour de chaque page et espace
+# entre deux pages, en points PDF (= pixels à l'écran)
+VIEWER_PADDING = 20
+VIEWER_PAGE_GAP = 40
+
+# Fichiers MIDI : résolution, tempo par défaut et indications de mouvement
+# reconnues dans l'en-tête ("Moderato", "Andante espressivo", "M.M. = 80")
+MIDI_TICKS_PER_BEAT = 480
+MIDI_TICKS_PER_DIVISION = MIDI_TICKS_PER_BEAT // MUSICXML_DIVISIONS
+MIDI_DEFAULT_TEMPO = 90
+MIDI_PROGRAM = 52  # General MIDI "Choir Aahs", sur les quatre voix
+MIDI_VELOCITY = 80
+TEMPO_TERMS = {
+    'largo': 50, 'lento': 60, 'adagio': 70, 'andante': 80, 'moderato': 100,
+    'allegretto': 112, 'allegro': 130, 'vivace': 150, 'presto': 170,
+}
+TEMPO_RE = re.compile(r'=(\d{2,3})|(' + '|'.join(sorted(TEMPO_TERMS, key=len, reverse=True)) + ')')
+
+# Seuils de proximité pour fusionner les glyphes en mots
+MERGE_MAX_DX = 20
+MERGE_MAX_DY = 5
+# Un chiffre d'une ligne de notes dont la taille est inférieure à cette fraction
+# de la taille médiane des notes de la page est un signe d'octave (les chiffres
+# d'octave sont composés plus petits que les notes).
+OCTAVE_SIZE_RATIO = 0.8
+
+# Codes des types d'éléments (colonne `type` d'ElementTable)
+TYPE_LYRIC, TYPE_NOTE, TYPE_RHYTHM, TYPE_OCTAVE, TYPE_CONTINUATION = 0, 1, 2, 3, 4
+TYPE_NAMES = np.array(['lyric', 'note', 'rhythm', 'octave', 'continuation'], dtype=object)
+# Version du format des tables enregistrées dans le cache (codes int8 de la
+# colonne `type`) : à incrémenter si l'encodage change sans que les valeurs
+# ci-dessus changent. TYPE_ENCODING entre dans les dépendances de toutes les
+# étapes et sorties qui lisent ou écrivent la colonne `type`.
+TABLE_FORMAT_VERSION = 1
+TYPE_ENCODING = (TABLE_FORMAT_VERSION, TYPE_LYRIC, TYPE_NOTE, TYPE_RHYTHM, TYPE_OCTAVE,
+                 TYPE_CONTINUATION, tuple(TYPE_NAMES.tolist()))
+
+# Schéma des fichiers compacts `.npz` (voir write_compact_npz)
+COMPACT_SCHEMA = {
+    'version': 1,
+    'colonnes': {
+        'text': "chaînes : valeurs distinctes text_utf8 + text_offsets, codes text_code (int32)",
+        'x': 'int32', 'y': 'int32',
+        'type': 'int8, indice dans types',
+        'num': "int32, numéro dans le type : id = types[type] + '_' + num (vide pour les paroles)",
+        'assoc': "int32, indice de l'élément associé, -1 sinon",
+    },
+    'types': TYPE_NAMES.tolist(),
+}
+
+# Une ligne contenant une note solfa (ou '-') est une ligne de notes
+NOTE_LINE_RE = re.compile(r'[drmfslt-]', re.IGNORECASE)
+# Ligne ne contenant que des chiffres, '│' et espaces
+OCTAVE_LINE_RE = re.compile(r'^[0-9│\s]+$')
+# Jetons d'une ligne de notes : notes solfa, symboles de rythme, chiffres d'octave
+TOKEN_RE = re.compile(r'(?P<note>[drmfslt-])|(?P<rhythm>[:.,|])|(?P<other>[│0-9])', re.IGNORECASE)
+TOKEN_TYPES = {'note': TYPE_NOTE, 'rhythm': TYPE_RHYTHM, 'other': TYPE_LYRIC}
+
+class ElementTable:
+    """
+    Représentation en colonnes des éléments d'une page, partagée par toutes les
+    étapes du pipeline (extraction, fusion, classification, association) :
+
+    - text  : tableau d'objets, chaînes internées (les mêmes glyphes reviennent sans cesse) ;
+    - x, y  : coordonnées entières (int32) ;
+    - type  : code du type (TYPE_LYRIC, TYPE_NOTE, ...) en int8, ou None avant classification ;
+    - num   : numéro de l'élément dans son type (17 pour "note_17"), 0 pour les paroles ;
+    - assoc : indice de la note associée dans la table, -1 sinon, ou None avant association ;
+    - font, size : police et taille de chaque glyphe (tables de glyphes uniquement, sinon None).
+
+    Les identifiants texte ("note_17") ne sont fabriqués qu'à la conversion en DataFrame.
+    """
+
+    __slots__ = ('text', 'x', 'y', 'type', 'num', 'assoc', 'font', 'size')
+
+    def __init__(self, text, x, y, type=None, num=None, assoc=None, font=None, size=None):
+        self.text = text
+        self.x = x
+        self.y = y
+        self.type = type
+        self.num = num
+        self.assoc = assoc
+        self.font = font
+        self.size = size
+
+    def __len__(self):
+        return len(self.x)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.x) == 0
+
+    @classmethod
+    def vide(cls) -> 'ElementTable':
+        return cls(np.empty(0, dtype=object), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32))
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> 'ElementTable':
+        """Construit une table à partir des colonnes text, x, y (et type si présente)."""
+        if df.empty:
+            return cls.vide()
+        types = None
+        if 'type' in df.columns:
+            codes = {nom: code for code, nom in enumerate(TYPE_NAMES)}
+            types = np.array([codes.get(t, TYPE_LYRIC) for t in df['type']], dtype=np.int8)
+        return cls(df['text'].to_numpy(dtype=object),
+                   df['x'].to_numpy().astype(np.int32),
+                   df['y'].to_numpy().astype(np.int32),
+                   types)
+
+    def ids(self) -> np.ndarray:
+        """Identifiants texte ("note_17", "rhythm_3", ...), '' pour les paroles."""
+        ids = np.full(len(self), '', dtype=object)
+        for code in (TYPE_NOTE, TYPE_RHYTHM, TYPE_OCTAVE):
+            positions = np.flatnonzero(self.type == code)
+            prefixe = TYPE_NAMES[code]
+            ids[positions] = [f"{prefixe}_{k}" for k in self.num[positions]]
+        return ids
+
+    def associated_ids(self) -> np.ndarray:
+        """Identifiant de la note associée à chaque élément, None s'il n'y en a pas."""
+        associated = np.full(len(self), None, dtype=object)
+        liees = np.flatnonzero(self.assoc >= 0)
+        associated[liees] = self.ids()[self.assoc[liees]]
+        return associated
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """DataFrame avec les colonnes que produisait chaque étape du pipeline d'origine."""
+        if self.empty:
+            return pd.DataFrame()
+        colonnes = {
+            'text': self.text.tolist(),
+            'x': self.x.astype(np.int64),
+            'y': self.y.astype(np.int64),
+        }
+        if self.type is not None:
+            colonnes['type'] = TYPE_NAMES[self.type].tolist()
+            colonnes['id'] = self.ids().tolist()
+        df = pd.DataFrame(colonnes)
+        if self.assoc is not None:
+            df['associated_id'] = pd.Series(self.associated_ids(), index=df.index, dtype=object)
+        return df
+
+class GlyphCache:
+    """
+    Cache disque des tables de glyphes brutes (text, x, y, police, taille), une
+    entrée `.npz` par (SHA-256 du PDF, page, version de l'extracteur). Les
+    relances sur un PDF inchangé sautent complètement le décodage par PyPDF2.
+    Le même cache garde les tables intermédiaires des étapes du pipeline
+    (voir analyze_page_incremental).
+
+    La date de modification d'une entrée est rafraîchie à chaque lecture ; quand
+    le cache dépasse `taille_max` octets, les entrées les moins récemment
+    utilisées sont supprimées.
+
+    La taille totale n'est mesurée (parcours du dossier) qu'au premier
+    enregistrement, puis tenue à jour à chaque écriture : le dossier n'est
+    reparcouru que lorsque l'estimation dépasse la limite, et l'éviction
+    descend alors jusqu'à EVICTION_RATIO de la limite. Avec plusieurs
+    processus, chacun ne compte que ses propres écritures entre deux
+    parcours ; le dépassement reste borné par ce qu'écrivent les autres.
+    """
+
+    # Après une éviction, le cache est ramené à cette fraction de taille_max,
+    # pour ne pas reparcourir le dossier à l'enregistrement suivant
+    EVICTION_RATIO = 0.9
+
+    def __init__(self, dossier: str = DEFAULT_CACHE_DIR, taille_max: int = DEFAULT_CACHE_SIZE):
+        self.dossier = dossier
+        self.taille_max = taille_max
+        self._taille = None  # estimation de la taille totale, None avant le premier parcours
+
+    def glyph_key(self, pdf_hash: str, page_num: int, version: str = EXTRACTOR_VERSION) -> str:
+        return f"{pdf_hash}_p{page_num:04d}_{version}"
+
+    def get(self, pdf_hash: str, page_num: int, version: str = EXTRACTOR_VERSION):
+        """Renvoie la table de glyphes en cache, ou None."""
+        return self.load_table(self.glyph_key(pdf_hash, page_num, version))
+
+    def put(self, pdf_hash: str, page_num: int, table: ElementTable,
+            version: str = EXTRACTOR_VERSION):
+        """Enregistre une table de glyphes puis applique la limite de taille."""
+        self.save_table(self.glyph_key(pdf_hash, page_num, version), table)
+
+    def load_table(self, cle: str):
+        """Renvoie l'ElementTable enregistrée sous `cle`, ou None."""
+        chemin = os.path.join(self.dossier, cle + ".npz")
+        try:
+            with np.load(chemin) as donnees:
+                table = table_from_arrays(donnees)
+        except (OSError, KeyError, ValueError, TypeError):
+            return None
+        try:
+            os.utime(chemin)
+        except OSError:
+            # Entrée supprimée entre-temps par l'éviction d'un autre processus
+            pass
+        return table
+
+    def save_table(self, cle: str, table: ElementTable):
+        """Enregistre une ElementTable (voir table_arrays)."""
+        os.makedirs(self.dossier, exist_ok=True)
+        chemin = os.path.join(self.dossier, cle + ".npz")
+        temporaire = f"{chemin}.{os.getpid()}.tmp"
+        with open(temporaire, 'wb') as f:
+            np.savez(f, **table_arrays(table))
+        try:
+            ancienne = os.path.getsize(chemin)
+        except OSError:
+            ancienne = 0
+        nouvelle = os.path.getsize(temporaire)
+        os.replace(temporaire, chemin)
+        self._added(nouvelle - ancienne)
+
+    def has_stamp(self, cle: str) -> bool:
+        """Vrai si un marqueur vide a été posé sous `cle` (sorties déjà écrites)."""
+        chemin = os.path.join(self.dossier, cle + ".stamp")
+        try:
+            os.utime(chemin)
+        except OSError:
+            # Absent, ou supprimé entre-temps par l'éviction d'un autre processus
+            return False
+        return True
+
+    def put_stamp(self, cle: str):
+        os.makedirs(self.dossier, exist_ok=True)
+        open(os.path.join(self.dossier, cle + ".stamp"), 'w').close()
+
+    def get_page_count(self, pdf_hash: str):
+        try:
+            with open(os.path.join(self.dossier, f"{pdf_hash}.json"), encoding="utf-8") as f:
+                return json.load(f)["pages"]
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def put_page_count(self, pdf_hash: str, page_count: int):
+        os.makedirs(self.dossier, exist_ok=True)
+        with open(os.path.join(self.dossier, f"{pdf_hash}.json"), "w", encoding="utf-8") as f:
+            json.dump({"pages": page_count}, f)
+
+    def _added(self, octets: int):
+        """Compte une écriture dans l'estimation de taille, et évince au besoin."""
+        if self._taille is None or self._taille + octets > self.taille_max:
+            self.evict()
+        else:
+            self._taille += octets
+
+    def evict(self, cible: int = None):
+        """
+        Parcourt le cache et supprime les entrées les plus anciennes s'il dépasse
+        sa taille, jusqu'à `cible` octets (par défaut EVICTION_RATIO × taille_max).
+        """
+        if cible is None:
+            cible = int(self.EVICTION_RATIO * self.taille_max)
+        entrees = []
+        for nom in os.listdir(self.dossier):
+            if nom.endswith(".tmp"):
+                # Écriture en cours dans un autre processus
+                continue
+            chemin = os.path.join(self.dossier, nom)
+            try:
+                stat = os.stat(chemin)
+            except OSError:
+                continue
+            entrees.append((stat.st_mtime, stat.st_size, chemin))
+        total = sum(taille for _, taille, _ in entrees)
+        if total > self.taille_max:
+            for _, taille, chemin in sorted(entrees):
+                if total <= cible:
+                    break
+                try:
+                    os.remove(chemin)
+                except OSError:
+                    pass
+                total -= taille
+        self._taille = total
+
+class PyPDF2Extractor:
+    """
+    Extracteur par défaut : PyPDF2, un rappel Python (visitor_text) par
+    opération de texte. Coordonnées issues de la matrice de texte (tm).
+    """
+
+    nom = "pypdf2"
+    # Options passées aux étapes du pipeline (voir PIPELINE_STAGES) : aucune,
+    # la classification reste celle d'origine
+    options_etapes = {}
+    version = EXTRACTOR_VERSION
+
+    def open(self, chemin: str):
+        return PdfReader(chemin)
+
+    def page_count(self, source) -> int:
+        return len(source.pages)
+
+    def glyphs(self, source, page_num: int) -> 'ElementTable':
+        return extract_glyph_table(source.pages[page_num - 1])
+
+    # Nombre d'objets résolus gardés par PyPDF2 au-delà duquel on les oublie
+    max_objets = 128
+
+    def release(self, source):
+        # PyPDF2 garde chaque objet résolu (flux de contenu, polices...) dans
+        # resolved_objects : sans ce ménage, la mémoire croît avec le nombre de
+        # pages lues. On ne vide qu'au-delà d'un seuil pour garder la plupart
+        # du temps les polices partagées ; les objets oubliés seront relus.
+        if len(source.resolved_objects) > self.max_objets:
+            source.resolved_objects.clear()
+
+    def close(self, source):
+        pass
+
+class PyMuPDFExtractor:
+    """
+    Extracteur PyMuPDF (MuPDF, en C) : tous les caractères d'une page, avec
+    leur position, leur police et leur taille, sont obtenus en un seul appel.
+    Coordonnées de la page, y vers le haut comme pour PyPDF2.
+    """
+
+    nom = "pymupdf"
+    version = PYMUPDF_EXTRACTOR_VERSION
+    # Les tailles de MuPDF sont fiables : la classification s'en sert pour les octaves
+    options_etapes = {'classification': {'octaves_par_taille': True}}
+
+    def open(self, chemin: str):
+        if pymupdf is None:
+            raise ImportError("L'extracteur pymupdf nécessite PyMuPDF : pip install pymupdf")
+        return pymupdf.open(chemin)
+
+    def page_count(self, source) -> int:
+        return source.page_count
+
+    def glyphs(self, source, page_num: int) -> 'ElementTable':
+        return extract_glyph_table_pymupdf(source[page_num - 1])
+
+    def release(self, source):
+        # Les pages sont libérées dès qu'elles ne sont plus référencées, et le
+        # cache interne de MuPDF a sa propre limite de taille.
+        pass
+
+    def close(self, source):
+        source.close()
+
+# Extracteurs disponibles, par nom (option --extracteur)
+EXTRACTORS = {
+    PyPDF2Extractor.nom: PyPDF2Extractor(),
+    PyMuPDFExtractor.nom: PyMuPDFExtractor(),
+}
+
+class PdfDocument:
+    """
+    PDF à analyser, ouvert à la demande : avec un GlyphCache, le document
+    n'est ouvert par l'extracteur que si une page (ou le nombre de pages)
+    manque au cache. Les glyphes en cache sont propres à chaque extracteur.
+    """
+
+    def __init__(self, chemin: str, cache: GlyphCache = None, extracteur: str = DEFAULT_EXTRACTOR):
+        self.chemin = chemin
+        self.cache = cache
+        self.extracteur = EXTRACTORS[extracteur]
+        self.sha256 = sha256_fichier(chemin) if cache is not None else None
+        self._source = None
+
+    @property
+    def source(self):
+        """Document ouvert par l'extracteur (PdfReader, document PyMuPDF...)."""
+        if self._source is None:
+            self._source = self.extracteur.open(self.chemin)
+        return self._source
+
+    def page_count(self) -> int:
+        if self.cache is not None:
+            nombre = self.cache.get_page_count(self.sha256)
+            if nombre is not None:
+                return nombre
+        nombre = self.extracteur.page_count(self.source)
+        if self.cache is not None:
+            self.cache.put_page_count(self.sha256, nombre)
+        return nombre
+
+    def glyph_key(self, page_num: int) -> str:
+        """Clé de la table de glyphes de la page dans le cache."""
+        return self.cache.glyph_key(self.sha256, page_num, self.extracteur.version)
+
+    def glyphs(self, page_num: int) -> ElementTable:
+        """Table de glyphes de la page, depuis le cache si possible."""
+        version = self.extracteur.version
+        if self.cache is not None:
+            table = self.cache.get(self.sha256, page_num, version)
+            if table is not None:
+                return table
+        table = self.extracteur.glyphs(self.source, page_num)
+        if self.cache is not None:
+            self.cache.put(self.sha256, page_num, table, version)
+        return table
+
+    def release(self):
+        """Libère les ressources des pages déjà lues, en gardant le document ouvert."""
+        if self._source is not None:
+            self.extracteur.release(self._source)
+
+    def close(self):
+        """Ferme le document ; il sera rouvert si une page est encore demandée."""
+        if self._source is not None:
+            self.extracteur.close(self._source)
+            self._source = None
+
+def pack_strings(chaines):
+    """
+    Concatène des chaînes en un tableau d'octets UTF-8 et leurs bornes, pour les
+    stocker sans la largeur fixe (celle de la plus longue) d'un tableau NumPy de str.
+    """
+    encodees = [str(c).encode('utf-8') for c in chaines]
+    bornes = np.zeros(len(encodees) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encodees], out=bornes[1:])
+    return np.frombuffer(b''.join(encodees), dtype=np.uint8), bornes
+
+def unpack_strings(octets: np.ndarray, bornes: np.ndarray) -> np.ndarray:
+    """Inverse de pack_strings : tableau d'objets de chaînes internées."""
+    brut = octets.tobytes()
+    return np.array([sys.intern(brut[a:b].decode('utf-8')) for a, b in zip(bornes[:-1], bornes[1:])],
+                    dtype=object)
+
+def table_arrays(table: ElementTable) -> dict:
+    """
+    Tableaux NumPy d'une ElementTable, pour np.savez : les colonnes numériques
+    telles quelles, les colonnes de chaînes comme un dictionnaire de valeurs
+    distinctes (`<col>_utf8` + `<col>_offsets`) et des codes (`<col>_code`).
+    """
+    tableaux = {}
+    for nom in ElementTable.__slots__:
+        colonne = getattr(table, nom)
+        if colonne is None:
+            continue
+        if colonne.dtype == object:
+            valeurs = {}
+            codes = np.fromiter((valeurs.setdefault(v, len(valeurs)) for v in colonne),
+                                dtype=np.int32, count=len(colonne))
+            tableaux[nom + '_utf8'], tableaux[nom + '_offsets'] = pack_strings(valeurs)
+            tableaux[nom + '_code'] = codes
+        else:
+            tableaux[nom] = colonne
+    return tableaux
+
+def table_from_arrays(donnees) -> ElementTable:
+    """Inverse de table_arrays (accepte le résultat de np.load)."""
+    colonnes = {}
+    for nom in ElementTable.__slots__:
+        if nom in donnees:
+            colonnes[nom] = donnees[nom]
+        elif nom + '_code' in donnees:
+            valeurs = unpack_strings(donnees[nom + '_utf8'], donnees[nom + '_offsets'])
+            colonnes[nom] = valeurs[donnees[nom + '_code']] if len(valeurs) \
+                else np.empty(0, dtype=object)
+    return ElementTable(**colonnes)
+
+class PageSpool:
+    """
+    Pages analysées d'un document mises de côté dans un dossier temporaire
+    (une ElementTable par fichier `.npz`, voir table_arrays), pour les relire
+    en flux autant de fois qu'il y a d'écrivains (mode --livre) : l'analyse
+    n'est faite qu'une fois et les tables ne restent pas en mémoire.
+    L'itération produit (numéro de page, table, clé dans le cache ou None),
+    comme iter_analyzed_pages.
+    """
+
+    def __init__(self):
+        self._dossier = tempfile.TemporaryDirectory(prefix="parsepdf-")
+        self.pages = []
+
+    def add(self, page_num: int, table: ElementTable, cle=None):
+        chemin = os.path.join(self._dossier.name, f"{len(self.pages):05d}.npz")
+        with open(chemin, 'wb') as f:
+            np.savez(f, **table_arrays(table))
+        self.pages.append((page_num, chemin, cle))
+
+    def __iter__(self):
+        for page_num, chemin, cle in self.pages:
+            with np.load(chemin) as donnees:
+                table = table_from_arrays(donnees)
+            yield page_num, table, cle
+
+    def keys(self) -> list:
+        """Clés des pages dans le cache (None pour une page analysée sans cache)."""
+        return [cle for _, _, cle in self.pages]
+
+    def close(self):
+        self._dossier.cleanup()
+
+def sha256_fichier(chemin: str) -> str:
+    """Empreinte SHA-256 d'un fichier, lu par blocs."""
+    empreinte = hashlib.sha256()
+    with open(chemin, 'rb') as f:
+        for bloc in iter(lambda: f.read(1024 * 1024), b''):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
 # --- Fonctions pour le traitement et l'analyse ---
 
 def extract_text_with_coordinates(pdf_path: str, page_num: int) -> pd.DataFrame:
@@ -42,261 +610,392 @@ def extract_text_with_coordinates(pdf_path: str, page_num: int) -> pd.DataFrame:
     Extrait le texte et les coordonnées de chaque mot de la page spécifiée du PDF
     en utilisant une fonction de visite (visitor).
     """
-    print(f"Extraction du texte et des coordonnées de la page {page_num}...")
     try:
         reader = PdfReader(pdf_path)
         page = reader.pages[page_num - 1]
-        
-        data = []
-        
-        def visitor_body(text, cm, tm, fontDict, fontSize):
-            """
-            Fonction de rappel pour capturer le texte et les coordonnées
-            """
-            # Récupération des coordonnées x et y de la matrice de transformation (tm)
-            # tm[4] est la coordonnée x, tm[5] est la coordonnée y
-            x = tm[4]
-            y = tm[5]
-            
-            # Ajoutez le texte et les coordonnées à notre liste
-            data.append({'text': text.strip(), 'x': x, 'y': y})
-
-        page.extract_text(visitor_text=visitor_body)
-        
-        # Création du DataFrame
-        df = pd.DataFrame(data)
-        
-        # Nettoyer les entrées vides ou non pertinentes
-        df = df[df['text'] != '']
-        
-        # Grouper les mots en se basant sur la proximité x et y pour former
-        # des lignes logiques
-        df['x'] = df['x'].round(0).astype(int)
-        df['y'] = df['y'].round(0).astype(int)
-        df = df.sort_values(by=['y', 'x'], ascending=[False, True]).reset_index(drop=True)
-        
+    except Exception as e:
+        print(f"Erreur lors de l'extraction du texte : {e}")
+        return pd.DataFrame()
+    return extract_page_coordinates(page, page_num)
+
+def extract_page_coordinates(page, page_num: int) -> pd.DataFrame:
+    """
+    Extrait le texte et les coordonnées d'une page déjà ouverte (objet page de PyPDF2),
+    ce qui permet de traiter plusieurs pages avec un seul PdfReader.
+    """
+    return extract_page_elements(page, page_num).to_dataframe()
+
+def extract_page_elements(page, page_num: int) -> ElementTable:
+    """
+    Version en colonnes de extract_page_coordinates : renvoie les mots de la page
+    sous forme d'ElementTable (vide en cas d'erreur). `page` peut être une page
+    PyPDF2 ou un PdfDocument, qui passe alors par son cache de glyphes.
+    """
+    print(f"Extraction du texte et des coordonnées de la page {page_num}...")
+    try:
+        with profile_stage('extraction'):
+            if isinstance(page, PdfDocument):
+                glyphes = page.glyphs(page_num)
+            else:
+                glyphes = extract_glyph_table(page)
+        profile_count('extraction', glyphes)
+
         # La fonction visitor_body donne chaque caractère ou segment de texte,
         # nous devons les regrouper en mots logiques.
-        processed_data = []
-        if not df.empty:
-            current_x = df.loc[0, 'x']
-            current_y = df.loc[0, 'y']
-            current_text = df.loc[0, 'text']
-            
-            for i in range(1, len(df)):
-                next_x = df.loc[i, 'x']
-                next_y = df.loc[i, 'y']
-                next_text = df.loc[i, 'text']
-                
-                # Si le mot suivant est proche, on l'ajoute au mot courant
-                if abs(next_x - current_x) < 20 and abs(next_y - current_y) < 5:
-                    current_text += next_text
-                    current_x = next_x
-                else:
-                    processed_data.append({'text': current_text, 'x': current_x, 'y': current_y})
-                    current_x = next_x
-                    current_y = next_y
-                    current_text = next_text
-            
-            processed_data.append({'text': current_text, 'x': current_x, 'y': current_y})
-            
-        df_final = pd.DataFrame(processed_data)
+        with profile_stage('fusion'):
+            mots = merge_glyph_table(glyphes)
+        profile_count('fusion', mots)
         
         print("Extraction réussie.")
-        return df_final
+        return mots
     except Exception as e:
         print(f"Erreur lors de l'extraction du texte : {e}")
-        return pd.DataFrame()
+        return ElementTable.vide()
+
+def extract_glyphs(page) -> pd.DataFrame:
+    """
+    Renvoie la table brute des glyphes d'une page (text, x, y), nettoyée des
+    entrées vides, arrondie et triée par y décroissant puis x croissant.
+    """
+    return extract_glyph_table(page).to_dataframe()
+
+def extract_glyph_table(page) -> ElementTable:
+    """Version en colonnes de extract_glyphs, avec la police et la taille de chaque glyphe."""
+    textes = []
+    xs = []
+    ys = []
+    polices = []
+    tailles = []
+
+    def visitor_body(text, cm, tm, fontDict, fontSize):
+        """
+        Fonction de rappel pour capturer le texte et les coordonnées
+        """
+        # Récupération des coordonnées x et y de la matrice de transformation (tm)
+        # tm[4] est la coordonnée x, tm[5] est la coordonnée y
+        text = text.strip()
+        # Nettoyer les entrées vides ou non pertinentes
+        if text:
+            textes.append(sys.intern(text))
+            xs.append(tm[4])
+            ys.append(tm[5])
+            polices.append(sys.intern(str(fontDict.get('/BaseFont', ''))) if fontDict else '')
+            tailles.append(fontSize or 0.0)
+
+    page.extract_text(visitor_text=visitor_body)
+    return glyph_table_from_lists(textes, xs, ys, polices, tailles)
+
+def extract_glyph_table_pymupdf(page) -> ElementTable:
+    """
+    Équivalent de extract_glyph_table pour une page PyMuPDF. Les caractères
+    viennent d'un seul appel à get_text("rawdict") ; chaque suite de caractères
+    sans espace d'un même span forme un glyphe, placé à l'origine de son premier
+    caractère, comme les segments que PyPDF2 passe à visitor_body. Un glyphe
+    suivi d'un espace dans le span garde une espace finale, pour que la fusion
+    ne colle pas les mots d'une parole ("is Bb" et non "isBb").
+    """
+    hauteur = page.rect.height
+    textes = []
+    xs = []
+    ys = []
+    polices = []
+    tailles = []
+
+    contenu = page.get_text("rawdict", flags=pymupdf.TEXTFLAGS_RAWDICT & ~pymupdf.TEXT_PRESERVE_IMAGES)
+    for bloc in contenu['blocks']:
+        for ligne in bloc.get('lines', ()):
+            for span in ligne['spans']:
+                police = sys.intern(span['font'])
+                groupes = [(espace, list(groupe)) for espace, groupe in
+                           itertools.groupby(span['chars'], key=lambda car: car['c'].isspace())]
+                for k, (espace, groupe) in enumerate(groupes):
+                    if espace:
+                        continue
+                    texte = ''.join(car['c'] for car in groupe)
+                    if k + 1 < len(groupes):
+                        texte += ' '
+                    x, y = groupe[0]['origin']
+                    textes.append(sys.intern(texte))
+                    xs.append(x)
+                    ys.append(hauteur - y)
+                    polices.append(police)
+                    tailles.append(span['size'])
+    return glyph_table_from_lists(textes, xs, ys, polices, tailles)
+
+def glyph_table_from_lists(textes, xs, ys, polices, tailles) -> ElementTable:
+    """Construit une table de glyphes triée à partir des listes remplies par un extracteur."""
+    x = np.round(np.asarray(xs, dtype=float)).astype(np.int32)
+    y = np.round(np.asarray(ys, dtype=float)).astype(np.int32)
+    # Tri par y décroissant puis x croissant (stable, comme le tri multi-colonnes de pandas)
+    ordre = np.lexsort((x, -y))
+    return ElementTable(np.array(textes, dtype=object)[ordre] if textes else np.empty(0, dtype=object),
+                        x[ordre], y[ordre],
+                        font=np.array(polices, dtype=object)[ordre] if polices else np.empty(0, dtype=object),
+                        size=np.asarray(tailles, dtype=np.float32)[ordre])
+
+def merge_glyphs(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Regroupe les glyphes, triés par y décroissant puis x croissant, en mots logiques.
+    Voir merge_glyph_table.
+    """
+    return merge_glyph_table(ElementTable.from_dataframe(df)).to_dataframe()
+
+def merge_glyph_table(glyphes: ElementTable) -> ElementTable:
+    """
+    Regroupe les glyphes, triés par y décroissant puis x croissant, en mots logiques.
+    Un glyphe rejoint le mot courant si son x est à moins de 20 du glyphe précédent
+    et son y à moins de 5 du premier glyphe du mot. Le mot garde le y de son premier
+    glyphe et le x de son dernier, ainsi que la police et la taille de son premier
+    glyphe quand l'extracteur les fournit.
+
+    Les identifiants de mot sont calculés sur des tableaux NumPy (différences
+    puis cumsum) au lieu d'une boucle Python sur les lignes du DataFrame.
+    """
+    if glyphes.empty:
+        return ElementTable.vide()
+
+    x = glyphes.x
+    y = glyphes.y
+    textes = glyphes.text
+
+    rupture = np.ones(len(x), dtype=bool)
+    rupture[1:] = (np.abs(np.diff(x)) >= MERGE_MAX_DX) | (np.abs(np.diff(y)) >= MERGE_MAX_DY)
+
+    # Le seuil en y se mesure depuis le premier glyphe du mot : une dérive lente
+    # peut donc imposer des coupures que la différence entre voisins ne voit pas.
+    # On coupe au premier dépassement de chaque mot, jusqu'à stabilité.
+    while True:
+        debuts = np.flatnonzero(rupture)
+        groupes = np.cumsum(rupture) - 1
+        depassement = np.abs(y - y[debuts][groupes]) >= MERGE_MAX_DY
+        if not depassement.any():
+            break
+        positions = np.flatnonzero(depassement)
+        _, premiers = np.unique(groupes[positions], return_index=True)
+        rupture[positions[premiers]] = True
+
+    fins = np.append(debuts[1:], len(x)) - 1
+    mots = np.add.reduceat(textes, debuts)
+    return ElementTable(np.array([sys.intern(m.strip()) for m in mots], dtype=object),
+                        x[fins], y[debuts],
+                        font=glyphes.font[debuts] if glyphes.font is not None else None,
+                        size=glyphes.size[debuts] if glyphes.size is not None else None)
 
 def classify_and_annotate_text(df: pd.DataFrame) -> pd.DataFrame:
     """
     Classifie les lignes entières avant de classer chaque élément de texte.
     Une ligne est classée comme 'notes', 'octave' ou 'lyrics'.
     Ensuite, les éléments individuels d'une ligne de notes sont séparés et annotés.
+    Voir classify_elements.
     """
     print("Classification et annotation des textes...")
-    lines_df = df.groupby('y').agg({
-        'text': ' '.join,
-        'x': 'first'
-    }).reset_index().sort_values(by='y', ascending=False)
-    
-    new_data = []
-    
-    note_id_counter = 0
-    rhythm_id_counter = 0
-    octave_id_counter = 0
+    df_final = classify_elements(ElementTable.from_dataframe(df)).to_dataframe()
+    print("Classification terminée.")
+    return df_final
 
-    note_line_regex = r'[drmfslt-]'
-    octave_line_regex = r'^[0-9│\s]+$' # Ligne ne contenant que des chiffres, '|' et espaces
+def classify_elements(mots: ElementTable, octaves_par_taille: bool = False) -> ElementTable:
+    """
+    Version en colonnes de classify_and_annotate_text.
 
-    for _, line in lines_df.iterrows():
-        line_text = line['text']
-        y_coord = line['y']
-        
-        line_type = 'lyric'
-        if re.search(note_line_regex, line_text, re.IGNORECASE):
-            line_type = 'note'
-        elif re.search(octave_line_regex, line_text):
-            line_type = 'octave'
+    Les lignes sont délimitées en une seule passe sur les tableaux triés par y,
+    les expressions régulières sont compilées une fois pour toutes, et les jetons
+    sont écrits dans des colonnes préallouées.
+
+    Avec `octaves_par_taille` (extracteur pymupdf, voir options_etapes) et si
+    la taille des glyphes est connue, elle départage octaves et notes sur les
+    lignes de musique retenues par musical_lines : la taille de référence est
+    la médiane des éléments portant une barre de mesure ou un deux-points, et
+    un chiffre ou un trait "│" plus petit que OCTAVE_SIZE_RATIO fois cette
+    taille y devient un signe d'octave. Les autres lignes (titres, crédits en
+    pied de page...) sont classées comme à l'origine.
+    """
+    if mots.empty:
+        return ElementTable.vide()
+
+    textes = mots.text
+    xs = mots.x
+    ys = mots.y
+
+    # Ordre des lignes (y décroissant) ; dans une ligne, l'ordre d'origine
+    # pour le texte de la ligne, et l'ordre des x pour les éléments.
+    ordre_ligne = np.argsort(-ys, kind='stable')
+    ordre_elem = np.lexsort((xs, -ys))
+    y_tries = ys[ordre_ligne]
+    debuts = np.flatnonzero(np.r_[True, y_tries[1:] != y_tries[:-1]])
+    fins = np.r_[debuts[1:], len(y_tries)]
+
+    seuil_octave = None
+    if octaves_par_taille and mots.size is not None:
+        reperes = np.fromiter((':' in t or '|' in t for t in textes), dtype=bool, count=len(textes))
+        if reperes.any():
+            seuil_octave = OCTAVE_SIZE_RATIO * float(np.median(mots.size[reperes]))
+
+    # Un élément produit au plus un jeton par caractère et un texte entre deux jetons
+    capacite = 2 * sum(len(t) for t in textes) + len(textes) + len(debuts)
+    col_text = np.empty(capacite, dtype=object)
+    col_x = np.empty(capacite, dtype=np.int32)
+    col_y = np.empty(capacite, dtype=np.int32)
+    col_type = np.empty(capacite, dtype=np.int8)
+    col_petit = np.zeros(capacite, dtype=bool)
+    n = 0
+
+    def emettre(texte, x, y, code):
+        nonlocal n
+        col_text[n] = sys.intern(texte)
+        col_x[n] = x
+        col_y[n] = y
+        col_type[n] = code
+        n += 1
+
+    for debut, fin in zip(debuts, fins):
+        positions = ordre_ligne[debut:fin]
+        line_text = ' '.join(textes[positions])
+        y_coord = ys[positions[0]]
 
         # Pour les lignes de paroles, on les ajoute telles quelles
-        if line_type == 'lyric':
-            new_data.append({
-                'text': line_text,
-                'x': line['x'],
-                'y': y_coord,
-                'type': 'lyric',
-                'id': ''
-            })
+        if NOTE_LINE_RE.search(line_text):
+            line_type = 'note'
+        elif OCTAVE_LINE_RE.search(line_text):
+            line_type = 'octave'
         else:
-            # Pour les lignes de notes ou d'octave, on analyse chaque mot
-            line_elements = df[df['y'] == y_coord].sort_values(by='x').to_dict('records')
-            
-            note_regex = r'[drmfslt-]'  # Les notes solfa
-            octave_regex = r'[│0-9]'    # Les chiffres sont des octaves
-            rhythm_regex = r'[:.,|]'    # Les symboles de rythme
-
-            combined_regex = f"({octave_regex}|{note_regex}|{rhythm_regex})"
-            
-            for elem in line_elements:
-                text_to_process = elem['text'].strip()
-                
-                if not text_to_process:
-                    continue
+            emettre(line_text, xs[positions[0]], y_coord, TYPE_LYRIC)
+            continue
 
-                # On ne découpe que les lignes de notes/octave
-                if line_type == 'note':
-                    matches = list(re.finditer(combined_regex, text_to_process, re.IGNORECASE))
-                    if matches:
-                        last_pos = 0
-                        for match in matches:
-                            preceding_text = text_to_process[last_pos:match.start()].strip()
-                            if preceding_text:
-                                # Le texte avant une note est considéré comme lyric
-                                new_data.append({
-                                    'text': preceding_text,
-                                    'x': elem['x'],
-                                    'y': elem['y'],
-                                    'type': 'lyric',
-                                    'id': ''
-                                })
-                            
-                            matched_text = match.group(0)
-                            
-                            if re.search(note_regex, matched_text, re.IGNORECASE) or matched_text == '-':
-                                note_id_counter += 1
-                                new_data.append({
-                                    'text': matched_text,
-                                    'x': elem['x'],
-                                    'y': elem['y'],
-                                    'type': 'note',
-                                    'id': f"note_{note_id_counter}"
-                                })
-                            elif re.search(rhythm_regex, matched_text):
-                                rhythm_id_counter += 1
-                                new_data.append({
-                                    'text': matched_text,
-                                    'x': elem['x'],
-                                    'y': elem['y'],
-                                    'type': 'rhythm',
-                                    'id': f"rhythm_{rhythm_id_counter}"
-                                })
-                            else: # Fallback to lyric
-                                new_data.append({
-                                    'text': matched_text,
-                                    'x': elem['x'],
-                                    'y': elem['y'],
-                                    'type': 'lyric',
-                                    'id': ''
-                                })
-                            
-                            last_pos = match.end()
-
-                        remaining_text = text_to_process[last_pos:].strip()
-                        if remaining_text:
-                            new_data.append({
-                                'text': remaining_text,
-                                'x': elem['x'],
-                                'y': elem['y'],
-                                'type': 'lyric',
-                                'id': ''
-                            })
-                    else:
-                         new_data.append({
-                            'text': text_to_process,
-                            'x': elem['x'],
-                            'y': elem['y'],
-                            'type': 'lyric',
-                            'id': ''
-                        })
-                
-                elif line_type == 'octave':
-                    octave_id_counter += 1
-                    new_data.append({
-                        'text': text_to_process,
-                        'x': elem['x'],
-                        'y': elem['y'],
-                        'type': 'octave',
-                        'id': f"octave_{octave_id_counter}"
-                    })
-
-    df_final = pd.DataFrame(new_data)
-    print("Classification terminée.")
-    return df_final
+        # Pour les lignes de notes ou d'octave, on analyse chaque mot
+        for i in ordre_elem[debut:fin]:
+            text_to_process = textes[i].strip()
+            if not text_to_process:
+                continue
+            x, y = xs[i], ys[i]
+
+            if line_type == 'octave':
+                emettre(text_to_process, x, y, TYPE_OCTAVE)
+                continue
+
+            # On ne découpe que les lignes de notes : le texte entre deux
+            # jetons est considéré comme lyric
+            petit = seuil_octave is not None and mots.size[i] < seuil_octave
+            last_pos = 0
+            for match in TOKEN_RE.finditer(text_to_process):
+                preceding_text = text_to_process[last_pos:match.start()].strip()
+                if preceding_text:
+                    emettre(preceding_text, x, y, TYPE_LYRIC)
+                col_petit[n] = petit and match.lastgroup == 'other'
+                emettre(match.group(0), x, y, TOKEN_TYPES[match.lastgroup])
+                last_pos = match.end()
+
+            remaining_text = text_to_process[last_pos:].strip()
+            if remaining_text:
+                emettre(remaining_text, x, y, TYPE_LYRIC)
+
+    col_type = col_type[:n].copy()
+    if seuil_octave is not None:
+        lignes = musical_lines(ElementTable(col_text[:n], col_x[:n], col_y[:n], col_type))
+        if lignes:
+            sur_ligne = np.zeros(n, dtype=bool)
+            sur_ligne[np.concatenate(lignes)] = True
+            col_type[sur_ligne & col_petit[:n]] = TYPE_OCTAVE
+    col_num = np.zeros(n, dtype=np.int32)
+    for code in (TYPE_NOTE, TYPE_RHYTHM, TYPE_OCTAVE):
+        positions = np.flatnonzero(col_type == code)
+        col_num[positions] = np.arange(1, len(positions) + 1)
+
+    return ElementTable(col_text[:n].copy(), col_x[:n].copy(), col_y[:n].copy(), col_type, col_num)
 
 
 def associate_symbols_to_notes(df: pd.DataFrame) -> pd.DataFrame:
     """
     Associe les symboles de rythme et d'octave aux notes.
+    - rythme (et continuation) : la note la plus proche à gauche sur la même ligne ;
+    - octave : la note la plus proche verticalement, sur toute la page.
+    En cas d'égalité, la première note dans l'ordre du DataFrame l'emporte.
+    Voir associate_elements.
     """
     print("Association des symboles aux notes...")
     df_copy = df.copy()
-    df_copy['associated_id'] = None
-    
-    # Trouver toutes les notes et leurs positions
-    notes = df_copy[df_copy['type'] == 'note'].to_dict('records')
-    
-    # Parcourir chaque élément pour trouver ses associations
-    for index, row in df_copy.iterrows():
-        if row['type'] in ['rhythm', 'continuation']:
-            # Pour les rythmes et continuations, trouver la note la plus proche à gauche sur la même ligne
-            closest_note = None
-            min_dist_x = float('inf')
-            
-            for note in notes:
-                if note['y'] == row['y'] and note['x'] < row['x']:
-                    dist_x = row['x'] - note['x']
-                    if dist_x < min_dist_x:
-                        min_dist_x = dist_x
-                        closest_note = note
-            
-            if closest_note:
-                df_copy.loc[index, 'associated_id'] = closest_note['id']
-                
-        elif row['type'] == 'octave':
-            # Pour les octaves, trouver la note la plus proche (proximité verticale)
-            closest_note = None
-            min_dist_y = float('inf')
-            
-            for note in notes:
-                dist_y = abs(row['y'] - note['y'])
-                if dist_y < min_dist_y:
-                    min_dist_y = dist_y
-                    closest_note = note
-                    
-            if closest_note:
-                df_copy.loc[index, 'associated_id'] = closest_note['id']
-                
+
+    assoc = associate_indices(ElementTable.from_dataframe(df_copy))
+    ids = df_copy['id'].to_numpy(dtype=object)
+    associated = np.full(len(df_copy), None, dtype=object)
+    liees = np.flatnonzero(assoc >= 0)
+    associated[liees] = ids[assoc[liees]]
+    df_copy['associated_id'] = pd.Series(associated, index=df_copy.index, dtype=object)
+
     print("Association terminée.")
     return df_copy
 
+def associate_elements(elements: ElementTable) -> ElementTable:
+    """Version en colonnes de associate_symbols_to_notes : renseigne `assoc`."""
+    return ElementTable(elements.text, elements.x, elements.y, elements.type, elements.num,
+                        associate_indices(elements))
+
+def associate_indices(elements: ElementTable) -> np.ndarray:
+    """
+    Renvoie, pour chaque élément, l'indice de la note associée (-1 sinon).
+
+    Les recherches passent par des tableaux triés et np.searchsorted, en
+    O(log n) par symbole au lieu d'un parcours de toutes les notes.
+    """
+    types = elements.type
+    x = elements.x.astype(np.int64)
+    y = elements.y.astype(np.int64)
+    assoc = np.full(len(elements), -1, dtype=np.int32)
+    if elements.empty:
+        return assoc
+
+    # Trouver toutes les notes et leurs positions (ordre = rang dans la table)
+    note_pos = np.flatnonzero(types == TYPE_NOTE)
+    if len(note_pos):
+        nx, ny = x[note_pos], y[note_pos]
+
+        # Rythmes et continuations : index trié par (ligne, x, rang décroissant).
+        # L'élément qui précède le point d'insertion est la note la plus à droite
+        # strictement à gauche du symbole ; à x égal, celle de plus petit rang.
+        rhythm_pos = np.flatnonzero((types == TYPE_RHYTHM) | (types == TYPE_CONTINUATION))
+        if len(rhythm_pos):
+            lignes = np.unique(ny)
+            x_min = min(nx.min(), x[rhythm_pos].min())
+            largeur = max(nx.max(), x[rhythm_pos].max()) - x_min + 1
+            ordre = np.lexsort((-np.arange(len(note_pos)), nx, ny))
+            cles = (np.searchsorted(lignes, ny) * largeur + (nx - x_min))[ordre]
+
+            ry = y[rhythm_pos]
+            ligne_r = np.searchsorted(lignes, ry)
+            meme_ligne = (ligne_r < len(lignes)) & (lignes[np.minimum(ligne_r, len(lignes) - 1)] == ry)
+            cles_r = ligne_r * largeur + (x[rhythm_pos] - x_min)
+            precedent = np.searchsorted(cles, cles_r, side='left') - 1
+            valide = meme_ligne & (precedent >= 0)
+            candidat = ordre[np.maximum(precedent, 0)]
+            valide &= ny[candidat] == ry
+            assoc[rhythm_pos[valide]] = note_pos[candidat[valide]]
+
+        # Octaves : ordonnées distinctes des notes, avec la première note de chacune.
+        octave_pos = np.flatnonzero(types == TYPE_OCTAVE)
+        if len(octave_pos):
+            lignes, premiere = np.unique(ny, return_index=True)
+            oy = y[octave_pos]
+            au_dessus = np.clip(np.searchsorted(lignes, oy), 0, len(lignes) - 1)
+            en_dessous = np.clip(au_dessus - 1, 0, len(lignes) - 1)
+            d_dessus = np.abs(lignes[au_dessus] - oy)
+            d_dessous = np.abs(lignes[en_dessous] - oy)
+            choix = np.where(
+                (d_dessous < d_dessus)
+                | ((d_dessous == d_dessus) & (premiere[en_dessous] < premiere[au_dessus])),
+                en_dessous, au_dessus)
+            assoc[octave_pos] = note_pos[premiere[choix]]
 
-def generate_html_from_dataframe(df: pd.DataFrame, page_title: str):
+    return assoc
+
+
+def generate_html_from_dataframe(df, page_title: str,
+                                 nom_fichier_sortie: str = "partition_analyse.html"):
     """
     Génère un fichier HTML pour afficher le texte sur un canvas avec des couleurs
-    basées sur la classification.
+    basées sur la classification. Accepte un DataFrame ou une ElementTable.
     """
     print("Génération du fichier HTML...")
+    if isinstance(df, ElementTable):
+        df = df.to_dataframe()
 
     df_json = df.to_json(orient='records')
     
@@ -375,7 +1074,6 @@ def generate_html_from_dataframe(df: pd.DataFrame, page_title: str):
 </html>
     """
 
-    nom_fichier_sortie = "partition_analyse.html"
     try:
         with open(nom_fichier_sortie, "w", encoding="utf-8") as f:
             f.write(html_content)
@@ -383,51 +1081,1600 @@ def generate_html_from_dataframe(df: pd.DataFrame, page_title: str):
     except Exception as e:
         print(f"Impossible de sauvegarder le fichier HTML : {e}")
 
-def generate_json_from_dataframe(df: pd.DataFrame, pdf_title: str):
+def write_viewer(pages, titre: str, nom_fichier_sortie: str) -> int:
     """
-    Génère un fichier JSON structuré à partir du DataFrame.
+    Visionneuse légère : une page HTML fixe (`nom_fichier_sortie`) et, à côté,
+    un fichier de données `<nom>.data.js` chargé par une balise <script> (donc
+    lisible en file://). Les données sont écrites page par page, à partir de
+    (numéro de page, table) comme les produit iter_analyzed_pages : la mémoire
+    ne dépend pas du nombre de pages.
+
+    La mise en page est calculée ici : pages empilées verticalement, coordonnées
+    écran (origine en haut à gauche), éléments triés par y écran et textes
+    dédupliqués par page. Le navigateur ne dessine que les éléments visibles
+    (recherche dichotomique sur y), au plus une fois par image pendant le
+    défilement et une fois le redimensionnement terminé.
+    Renvoie le nombre de pages écrites.
     """
-    print("Génération du fichier JSON...")
-    score_data = {
-        "title": pdf_title,
-        "lines": []
-    }
-    
-    # Créer un dictionnaire pour regrouper les mots par ligne (coordonnée Y)
-    lines_dict = {}
-    for _, row in df.sort_values(by=['y', 'x'], ascending=[False, True]).iterrows():
-        y_val = row['y']
-        if y_val not in lines_dict:
-            lines_dict[y_val] = {
-                "text": [],
-                "elements": []
+    fichier_donnees = os.path.splitext(nom_fichier_sortie)[0] + ".data.js"
+    haut = largeur = nb_pages = 0
+    with open(fichier_donnees, "w", encoding="utf-8") as f:
+        f.write("window.PARTITION_DATA = "
+                + json.dumps({"title": titre, "types": TYPE_NAMES.tolist(), "pages": []}, ensure_ascii=False)
+                + ";\n")
+        for page_num, elements, *_ in pages:
+            if elements.empty:
+                continue
+            min_x, max_x = int(elements.x.min()), int(elements.x.max())
+            min_y, max_y = int(elements.y.min()), int(elements.y.max())
+            xs = elements.x.astype(np.int64) - min_x + VIEWER_PADDING
+            ys = max_y - elements.y.astype(np.int64) + VIEWER_PADDING
+            ordre = np.argsort(ys, kind='stable')
+            valeurs = {}
+            codes = [valeurs.setdefault(texte, len(valeurs)) for texte in elements.text[ordre].tolist()]
+            page = {
+                "page": page_num, "top": haut,
+                "width": max_x - min_x + 2 * VIEWER_PADDING, "height": max_y - min_y + 2 * VIEWER_PADDING,
+                "strings": list(valeurs), "s": codes,
+                "x": xs[ordre].tolist(), "y": ys[ordre].tolist(), "t": elements.type[ordre].tolist(),
             }
-        lines_dict[y_val]["text"].append(row['text'])
-        lines_dict[y_val]["elements"].append({
-            "text": row['text'],
-            "x": row['x'],
-            "y": row['y'],
-            "type": row['type'],
-            "id": row['id'],
-            "associated_id": row['associated_id']
-        })
-        
-    # Classification des lignes
-    for y, line_data in lines_dict.items():
-        is_notes = any(elem['type'] in ['note', 'rhythm', 'octave'] for elem in line_data['elements'])
-        line_data['type'] = 'notes' if is_notes else 'lyrics'
-        line_data['text'] = " ".join(line_data['text'])
-        
-    score_data["lines"] = list(lines_dict.values())
+            f.write("window.PARTITION_DATA.pages.push("
+                    + json.dumps(page, ensure_ascii=False, separators=(',', ':')) + ");\n")
+            haut += page["height"] + VIEWER_PAGE_GAP
+            largeur = max(largeur, page["width"])
+            nb_pages += 1
+        f.write(f"window.PARTITION_DATA.width = {largeur};\n"
+                f"window.PARTITION_DATA.height = {max(haut - VIEWER_PAGE_GAP, 0)};\n")
 
-    nom_fichier_sortie = "partition_analyse.json"
+    html_content = f"""<!DOCTYPE html>
+<html lang="fr">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{escape(titre)}</title>
+    <style>
+        html, body {{ margin: 0; height: 100%; font-family: sans-serif; background-color: #f4f4f4; }}
+        header {{ height: 40px; line-height: 40px; padding: 0 16px; background-color: white; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }}
+        #info {{ color: #777; margin-left: 1em; }}
+        #cadre {{ position: absolute; top: 40px; bottom: 0; left: 0; right: 0; }}
+        #vue {{ position: absolute; top: 0; bottom: 0; left: 0; right: 0; overflow: auto; }}
+        #partitionCanvas {{ position: absolute; top: 0; left: 0; pointer-events: none; }}
+    </style>
+</head>
+<body>
+    <header><strong>{escape(titre)}</strong><span id="info"></span></header>
+    <div id="cadre">
+        <div id="vue"><div id="espace"></div></div>
+        <canvas id="partitionCanvas"></canvas>
+    </div>
+
+    <script src="{quote(os.path.basename(fichier_donnees))}"></script>
+    <script>
+        const data = window.PARTITION_DATA;
+        const vue = document.getElementById('vue');
+        const espace = document.getElementById('espace');
+        const canvas = document.getElementById('partitionCanvas');
+        const ctx = canvas.getContext('2d');
+        const info = document.getElementById('info');
+
+        const colors = {{
+            'note': 'black',
+            'rhythm': 'green',
+            'octave': 'blue',
+            'lyric': 'red'
+        }};
+        const styles = data.types.map(type => colors[type] || 'black');
+        const octave = data.types.indexOf('octave');
+
+        espace.style.width = data.width + 'px';
+        espace.style.height = data.height + 'px';
+
+        // Premier indice i tel que ys[i] >= borne (ys est trié)
+        function premier(ys, borne) {{
+            let bas = 0, haut = ys.length;
+            while (bas < haut) {{
+                const milieu = (bas + haut) >> 1;
+                if (ys[milieu] < borne) bas = milieu + 1; else haut = milieu;
+            }}
+            return bas;
+        }}
+
+        function drawText() {{
+            const largeur = vue.clientWidth, hauteur = vue.clientHeight;
+            const ratio = window.devicePixelRatio || 1;
+            if (canvas.width !== Math.round(largeur * ratio) || canvas.height !== Math.round(hauteur * ratio)) {{
+                canvas.width = Math.round(largeur * ratio);
+                canvas.height = Math.round(hauteur * ratio);
+                canvas.style.width = largeur + 'px';
+                canvas.style.height = hauteur + 'px';
+            }}
+            ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+            ctx.clearRect(0, 0, largeur, hauteur);
+            ctx.textAlign = 'left';
+
+            // Seuls les éléments dont la ligne de base est dans la fenêtre sont dessinés
+            const gauche = vue.scrollLeft, haut = vue.scrollTop, bas = haut + hauteur + 12;
+            let visibles = 0;
+            for (const page of data.pages) {{
+                if (page.top > bas || page.top + page.height < haut) continue;
+                ctx.fillStyle = 'white';
+                ctx.fillRect(-gauche, page.top - haut, page.width, page.height);
+                if (page.page !== null) {{
+                    ctx.fillStyle = '#999';
+                    ctx.font = '10px sans-serif';
+                    ctx.fillText('page ' + page.page, 4 - gauche, page.top - haut + 12);
+                }}
+                const fin = premier(page.y, bas - page.top);
+                for (let i = premier(page.y, haut - page.top); i < fin; i++) {{
+                    const x = page.x[i] - gauche;
+                    if (x > largeur || x < -200) continue;
+                    ctx.fillStyle = styles[page.t[i]];
+                    ctx.font = page.t[i] === octave ? '8px sans-serif' : '10px sans-serif';
+                    ctx.fillText(page.strings[page.s[i]], x, page.top + page.y[i] - haut);
+                    visibles++;
+                }}
+            }}
+            info.textContent = data.pages.length + ' page(s), ' + visibles + ' élément(s) affiché(s)';
+        }}
+
+        // Au plus un dessin par image pendant le défilement
+        let demande = 0;
+        vue.addEventListener('scroll', () => {{
+            if (!demande) demande = requestAnimationFrame(() => {{ demande = 0; drawText(); }});
+        }});
+
+        // Un seul dessin, une fois le redimensionnement terminé
+        let minuterie = 0;
+        window.addEventListener('resize', () => {{
+            clearTimeout(minuterie);
+            minuterie = setTimeout(drawText, 150);
+        }});
+
+        drawText();
+    </script>
+</body>
+</html>
+"""
+    with open(nom_fichier_sortie, "w", encoding="utf-8") as f:
+        f.write(html_content)
+    return nb_pages
+
+def generate_viewer_from_elements(elements: ElementTable, titre: str,
+                                  nom_fichier_sortie: str = "partition_analyse_visionneuse.html"):
+    """Génère la visionneuse légère (HTML + données .data.js) d'une page analysée."""
+    print("Génération de la visionneuse...")
     try:
-        with open(nom_fichier_sortie, "w", encoding="utf-8") as f:
-            json.dump(score_data, f, ensure_ascii=False, indent=2)
+        write_viewer([(None, elements)], titre, nom_fichier_sortie)
+        print(f"Succès ! Le fichier '{nom_fichier_sortie}' a été créé.")
+    except Exception as e:
+        print(f"Impossible de sauvegarder la visionneuse : {e}")
+
+def score_lines(elements):
+    """
+    Générateur : lignes de la partition (même y), de haut en bas, chacune sous
+    la forme {"text", "elements", "type"} du fichier JSON, produites dès
+    qu'elles sont complètes. Parcourt des tableaux de colonnes triés par y
+    décroissant puis x croissant (tri stable), sans iterrows.
+    Accepte une ElementTable ou un DataFrame (colonnes de associate_symbols_to_notes).
+    """
+    if len(elements) == 0:
+        return
+    if isinstance(elements, ElementTable):
+        textes, xs, ys = elements.text, elements.x, elements.y
+        types, ids, associes = TYPE_NAMES[elements.type], elements.ids(), elements.associated_ids()
+    else:
+        textes, xs, ys = (elements[c].to_numpy() for c in ('text', 'x', 'y'))
+        types, ids, associes = (elements[c].to_numpy(dtype=object) for c in ('type', 'id', 'associated_id'))
+    ordre = np.lexsort((xs, -ys.astype(np.int64)))
+    ys_tries = ys[ordre]
+    debuts = np.flatnonzero(np.r_[True, ys_tries[1:] != ys_tries[:-1]])
+    fins = np.r_[debuts[1:], len(ordre)]
+    textes, xs, ys = textes[ordre].tolist(), xs[ordre].tolist(), ys_tries.tolist()
+    types, ids, associes = types[ordre].tolist(), ids[ordre].tolist(), associes[ordre].tolist()
+    for debut, fin in zip(debuts.tolist(), fins.tolist()):
+        ligne = [{"text": textes[k], "x": xs[k], "y": ys[k], "type": types[k], "id": ids[k],
+                  "associated_id": associes[k]} for k in range(debut, fin)]
+        yield {
+            "text": " ".join(textes[debut:fin]),
+            "elements": ligne,
+            "type": 'notes' if any(t in ('note', 'rhythm', 'octave') for t in types[debut:fin]) else 'lyrics',
+        }
+
+@contextlib.contextmanager
+def open_text_output(sortie):
+    """
+    Flux texte UTF-8 pour `sortie` : un chemin (compressé avec gzip s'il se
+    termine par .gz) ou un flux déjà ouvert, laissé ouvert.
+    """
+    if hasattr(sortie, 'write'):
+        yield sortie
+    elif str(sortie).endswith('.gz'):
+        with gzip.open(sortie, 'wt', encoding='utf-8') as f:
+            yield f
+    else:
+        with open(sortie, 'w', encoding='utf-8') as f:
+            yield f
+
+def _write_json_array(f, objets, indentation: str):
+    """Écrit une liste JSON objet par objet, avec la mise en forme de json.dump(indent=2)."""
+    separateur = "\n" + indentation + "  "
+    premier = True
+    for objet in objets:
+        f.write(("[" if premier else ",") + separateur)
+        f.write(json.dumps(objet, ensure_ascii=False, indent=2).replace("\n", separateur))
+        premier = False
+    f.write("[]" if premier else "\n" + indentation + "]")
+
+def write_score_json(elements, titre: str, sortie):
+    """
+    Écrit le JSON d'une page en flux, ligne de partition par ligne : le
+    résultat est identique à json.dump(..., indent=2) de la structure
+    {"title", "lines"}, sans jamais la construire en entier. `sortie` est un
+    chemin (.gz : compressé) ou un flux texte.
+    """
+    with open_text_output(sortie) as f:
+        f.write('{\n  "title": ' + json.dumps(titre, ensure_ascii=False) + ',\n  "lines": ')
+        _write_json_array(f, score_lines(elements), "  ")
+        f.write("\n}")
+
+def write_book_json(pages, titre: str, sortie):
+    """
+    Écrit en flux le JSON de plusieurs pages, {"title", "pages": [{"page",
+    "lines"}, ...]}, à partir de (numéro de page, table) comme les produisent
+    iter_analyzed_pages et PageSpool : la mémoire ne dépend pas du nombre de pages.
+    """
+    with open_text_output(sortie) as f:
+        f.write('{\n  "title": ' + json.dumps(titre, ensure_ascii=False) + ',\n  "pages": ')
+        premier = True
+        for page_num, elements, *_ in pages:
+            f.write(("[" if premier else ",") + '\n    {\n      "page": ' + json.dumps(page_num)
+                    + ',\n      "lines": ')
+            _write_json_array(f, score_lines(elements), "      ")
+            f.write("\n    }")
+            premier = False
+        f.write("[]" if premier else "\n  ]")
+        f.write("\n}")
+
+def generate_json_from_dataframe(df, pdf_title: str,
+                                 nom_fichier_sortie: str = "partition_analyse.json"):
+    """
+    Génère un fichier JSON structuré à partir du DataFrame (ou d'une ElementTable),
+    écrit en flux par write_score_json (compressé si le nom se termine par .gz).
+    """
+    print("Génération du fichier JSON...")
+    try:
+        write_score_json(df, pdf_title, nom_fichier_sortie)
         print(f"Succès ! Le fichier '{nom_fichier_sortie}' a été créé.")
     except Exception as e:
         print(f"Impossible de sauvegarder le fichier JSON : {e}")
 
+def write_compact_npz(elements: ElementTable, titre: str, nom_fichier_sortie: str):
+    """
+    Écrit une page analysée au format compact `.npz` (compressé) : les colonnes
+    de l'ElementTable (voir table_arrays et COMPACT_SCHEMA), plus le titre et
+    le schéma. L'identifiant d'un élément est TYPE_NAMES[type] + "_" + num, et
+    `assoc` donne l'indice (et non l'identifiant) de la note associée.
+    """
+    table = ElementTable(elements.text, elements.x, elements.y, elements.type,
+                         elements.num, elements.assoc)
+    with open(nom_fichier_sortie, 'wb') as f:
+        np.savez_compressed(f, titre=np.array(titre), schema=np.array(json.dumps(COMPACT_SCHEMA)),
+                            **table_arrays(table))
+
+def read_compact_npz(chemin: str):
+    """Relit un fichier écrit par write_compact_npz : (titre, ElementTable)."""
+    with np.load(chemin) as donnees:
+        schema = json.loads(str(donnees['schema']))
+        if schema.get('version') != COMPACT_SCHEMA['version']:
+            raise ValueError(f"{chemin} : version de schéma {schema.get('version')} non prise en charge")
+        return str(donnees['titre']), table_from_arrays(donnees)
+
+def generate_npz_from_elements(elements: ElementTable, titre: str,
+                               nom_fichier_sortie: str = "partition_analyse.npz"):
+    """Génère le fichier compact `.npz` d'une page analysée."""
+    print("Génération du fichier NPZ...")
+    try:
+        write_compact_npz(elements, titre, nom_fichier_sortie)
+        print(f"Succès ! Le fichier '{nom_fichier_sortie}' a été créé.")
+    except Exception as e:
+        print(f"Impossible de sauvegarder le fichier NPZ : {e}")
+
+def generate_jsonl_from_elements(elements: ElementTable, titre: str,
+                                 nom_fichier_sortie: str = "partition_analyse.jsonl"):
+    """
+    Génère un fichier JSON Lines : un objet par élément (text, x, y, type, id,
+    associated_id), écrit au fil de la table, sans indentation.
+    """
+    print("Génération du fichier JSONL...")
+    try:
+        types = TYPE_NAMES[elements.type].tolist()
+        with open(nom_fichier_sortie, "w", encoding="utf-8") as f:
+            for text, x, y, type_, id_, associe in zip(elements.text.tolist(), elements.x.tolist(),
+                                                        elements.y.tolist(), types,
+                                                        elements.ids().tolist(),
+                                                        elements.associated_ids().tolist()):
+                f.write(json.dumps({"text": text, "x": x, "y": y, "type": type_, "id": id_,
+                                    "associated_id": associe},
+                                   ensure_ascii=False, separators=(',', ':')))
+                f.write("\n")
+        print(f"Succès ! Le fichier '{nom_fichier_sortie}' a été créé.")
+    except Exception as e:
+        print(f"Impossible de sauvegarder le fichier JSONL : {e}")
+
+# Formats compacts proposés par --compact : extension -> générateur
+COMPACT_WRITERS = {
+    'npz': generate_npz_from_elements,
+    'jsonl': generate_jsonl_from_elements,
+}
+
+def detect_key(elements: ElementTable):
+    """
+    Tonique annoncée dans la page ("Doh is Bb"), sous la forme (lettre, altération),
+    ou None. Le texte de chaque ligne est recollé sans espaces, car la
+    classification découpe l'en-tête en jetons ("D", "oh", "i", "s", "Bb").
+    """
+    if elements.empty:
+        return None
+    ordre = np.argsort(-elements.y, kind='stable')
+    ys = elements.y[ordre]
+    debuts = np.flatnonzero(np.r_[True, ys[1:] != ys[:-1]])
+    for positions in np.split(ordre, debuts[1:]):
+        trouve = KEY_RE.search(''.join(elements.text[positions]).replace(' ', ''))
+        if trouve:
+            alteration = {'b': -1, '♭': -1, '#': 1, '♯': 1}.get(trouve.group(2), 0)
+            return trouve.group(1), alteration
+    return None
+
+def solfa_pitch(syllabe: str, alteration: int, octave: int, tonique=('C', 0)):
+    """
+    Hauteur d'une syllabe solfa (d, r, m...) dans la tonalité `tonique`.
+    Le doh de l'octave `octave` est la tonique prise dans l'octave MusicXML de
+    même numéro ; le nom de note suit le degré (m en Bb donne D, pas C##).
+    Renvoie (step, alter, octave, numéro MIDI).
+    """
+    lettre_do = SOLFA_TO_STEP[syllabe]
+    lettre_tonique, alter_tonique = tonique
+    midi = (12 * (octave + 1) + LETTER_SEMITONES[lettre_tonique] + alter_tonique
+            + LETTER_SEMITONES[lettre_do] + alteration)
+    step = STEP_LETTERS[(STEP_LETTERS.index(lettre_tonique) + STEP_LETTERS.index(lettre_do)) % 7]
+    alter = (midi - LETTER_SEMITONES[step] + 6) % 12 - 6
+    return step, alter, (midi - alter - LETTER_SEMITONES[step]) // 12 - 1, midi
+
+def musical_lines(elements: ElementTable) -> list:
+    """
+    Indices des éléments de chaque ligne de musique de la page, de haut en bas.
+    Une ligne de musique porte au moins un ':' ou une barre '|' et presque pas
+    de paroles : NOTE_LINE_RE accepte aussi les paroles contenant d, r, m...
+    (et les reprises ": / :"), qui ne doivent pas compter dans l'alternance
+    des voix.
+    """
+    reperes = (elements.type == TYPE_RHYTHM) & np.isin(elements.text, (':', '|'))
+    ys_musique = set(elements.y[reperes].tolist())
+    lignes = {}
+    paroles = {}
+    for i, y in enumerate(elements.y.tolist()):
+        if y not in ys_musique:
+            continue
+        lignes.setdefault(y, []).append(i)
+        texte = elements.text[i]
+        if (elements.type[i] == TYPE_LYRIC and texte not in SOLFA_CONTINUATIONS
+                and texte[:1] not in SOLFA_ALTERATIONS and not OCTAVE_LINE_RE.match(texte)):
+            paroles[y] = paroles.get(y, 0) + 1
+    return [lignes[y] for y in sorted(lignes, reverse=True) if paroles.get(y, 0) <= MUSIC_LINE_MAX_LYRICS]
+
+def octave_shifts(elements: ElementTable, lignes: list) -> dict:
+    """
+    Décalage d'octave de chaque note (indice -> décalage) d'après les signes
+    d'octave : '│' vaut 1, un chiffre sa valeur ; au-dessus de la ligne (exposant)
+    on monte, en dessous (indice) on descend. associate_elements donne la ligne
+    de notes visée ; dans cette ligne, le signe va à la note la plus proche, et
+    un signe fusionné ("││") couvre autant de notes en remontant depuis celle-ci.
+
+    Les jetons d'un même mot partagent le x de son dernier glyphe : la position
+    de chaque note est estimée en reculant de SOLFA_CHAR_WIDTH par caractère
+    depuis la fin du mot.
+    """
+    decalages = {}
+    if elements.assoc is None:
+        return decalages
+    signes = np.flatnonzero((elements.type == TYPE_OCTAVE) & (elements.assoc >= 0))
+    if not len(signes):
+        return decalages
+    notes_par_ligne = {}
+    for positions in lignes:
+        notes = []
+        positions_x = []
+        recul = 0
+        for n in range(len(positions) - 1, -1, -1):
+            i = positions[n]
+            if n + 1 < len(positions) and elements.x[positions[n + 1]] != elements.x[i]:
+                recul = 0
+            if elements.type[i] == TYPE_NOTE and elements.text[i].lower() in SOLFA_TO_STEP:
+                notes.append(i)
+                positions_x.append(elements.x[i] - recul * SOLFA_CHAR_WIDTH)
+            recul += len(elements.text[i])
+        notes_par_ligne[elements.y[positions[0]]] = (notes[::-1], np.array(positions_x[::-1]))
+    for i in signes:
+        y_ligne = elements.y[elements.assoc[i]]
+        notes, positions_x = notes_par_ligne.get(y_ligne, ((), None))
+        if not notes:
+            continue
+        sens = 1 if elements.y[i] > y_ligne else -1
+        valeurs = [1 if c == '│' else int(c) for c in elements.text[i] if c == '│' or c.isdigit()]
+        ancre = int(np.argmin(np.abs(positions_x - elements.x[i])))
+        for valeur, j in zip(reversed(valeurs), range(ancre, -1, -1)):
+            decalages[notes[j]] = sens * valeur
+    return decalages
+
+def _partage(total: int, parts: int) -> list:
+    """Découpe une durée entière en `parts` durées entières (le reste va à la dernière)."""
+    part = total // parts
+    return [part] * (parts - 1) + [total - part * (parts - 1)]
+
+def _decoupe(jetons: list, separateur: str) -> list:
+    groupes = [[]]
+    for jeton in jetons:
+        if jeton == separateur:
+            groupes.append([])
+        else:
+            groupes[-1].append(jeton)
+    return groupes
+
+class SolfaEvent:
+    """Note (pitch = (step, alter, octave, midi)) ou silence (pitch = None) d'une voix."""
+
+    __slots__ = ('pitch', 'duration', 'tie_start', 'tie_stop')
+
+    def __init__(self, pitch, duration: int, tie_stop: bool = False):
+        self.pitch = pitch
+        self.duration = duration
+        self.tie_start = False
+        self.tie_stop = tie_stop
+
+class SolfaScoreReader:
+    """
+    Reconstitue les mesures des quatre voix SATB à partir d'un flux de pages
+    analysées (ElementTable classées et associées).
+
+    Dans une ligne de musique, ':' et '|' ferment un temps, '|' ferme aussi la
+    mesure ; un temps est partagé en parts égales par '.', chaque part par ',',
+    et les notes d'une même part se la partagent. Une part vide est un silence,
+    '-' ou '‒' prolonge la note précédente (liée si une barre les sépare).
+    Les durées sont en MUSICXML_DIVISIONS par temps.
+
+    feed() renvoie les mesures terminées sous forme de (voix, événements) ;
+    seules les mesures en cours (et la précédente, pour une liaison) restent
+    en mémoire.
+    """
+
+    def __init__(self):
+        self.tonique = ('C', 0)
+        nombre = len(SATB_VOICES)
+        self._temps = [[] for _ in range(nombre)]
+        self._mesure = [[] for _ in range(nombre)]
+        self._attente = [None] * nombre
+        self._dernier = [None] * nombre
+
+    def feed(self, elements: ElementTable) -> list:
+        mesures = []
+        if elements.empty:
+            return mesures
+        tonique = detect_key(elements)
+        if tonique is not None:
+            self.tonique = tonique
+        lignes = musical_lines(elements)
+        decalages = octave_shifts(elements, lignes)
+        for k, positions in enumerate(lignes):
+            self._read_line(k % len(SATB_VOICES), elements, positions, decalages, mesures)
+        return mesures
+
+    def finish(self) -> list:
+        """Ferme les temps et mesures en cours et renvoie les dernières mesures."""
+        mesures = []
+        for voix in range(len(SATB_VOICES)):
+            if self._temps[voix]:
+                self._close_beat(voix)
+            self._close_measure(voix, mesures)
+            if self._attente[voix] is not None:
+                mesures.append((voix, self._attente[voix]))
+                self._attente[voix] = None
+        return mesures
+
+    def _read_line(self, voix, elements, positions, decalages, mesures):
+        textes = elements.text
+        types = elements.type
+        octave = SATB_VOICES[voix][2]
+        for n, i in enumerate(positions):
+            texte = textes[i]
+            if types[i] == TYPE_RHYTHM:
+                if texte in ('.', ','):
+                    self._temps[voix].append(texte)
+                else:
+                    self._close_beat(voix)
+                    if texte == '|':
+                        self._close_measure(voix, mesures)
+            elif texte in SOLFA_CONTINUATIONS:
+                self._temps[voix].append('-')
+            elif types[i] == TYPE_NOTE and texte.lower() in SOLFA_TO_STEP:
+                alteration = 0
+                if n + 1 < len(positions):
+                    suivant = positions[n + 1]
+                    if types[suivant] == TYPE_LYRIC and elements.x[suivant] == elements.x[i]:
+                        alteration = SOLFA_ALTERATIONS.get(textes[suivant][:1], 0)
+                self._temps[voix].append(solfa_pitch(texte.lower(), alteration,
+                                                     octave + decalages.get(i, 0), self.tonique))
+
+    def _close_beat(self, voix):
+        temps = self._temps[voix]
+        self._temps[voix] = []
+        if not temps and self._dernier[voix] is None:
+            return  # Barre ou deux-points avant la première note de la voix
+        demis = _decoupe(temps, '.')
+        for demi, duree_demi in zip(demis, _partage(MUSICXML_DIVISIONS, len(demis))):
+            quarts = _decoupe(demi, ',')
+            for quart, duree_quart in zip(quarts, _partage(duree_demi, len(quarts))):
+                if not quart:
+                    self._add(voix, None, duree_quart)
+                    continue
+                for jeton, duree in zip(quart, _partage(duree_quart, len(quart))):
+                    if jeton == '-':
+                        self._extend(voix, duree)
+                    else:
+                        self._add(voix, jeton, duree)
+
+    def _add(self, voix, pitch, duree, tie_stop=False):
+        if duree <= 0:
+            return  # Plus de jetons que de divisions dans le temps : jeton ignoré
+        evenement = SolfaEvent(pitch, duree, tie_stop)
+        self._mesure[voix].append(evenement)
+        self._dernier[voix] = evenement
+
+    def _extend(self, voix, duree):
+        dernier = self._dernier[voix]
+        if duree <= 0:
+            return
+        if dernier is None:
+            self._add(voix, None, duree)
+        elif self._mesure[voix] and self._mesure[voix][-1] is dernier:
+            dernier.duration += duree
+        else:
+            # La note se prolonge au-delà de la barre : note liée dans la nouvelle mesure
+            dernier.tie_start = dernier.pitch is not None
+            self._add(voix, dernier.pitch, duree, tie_stop=dernier.pitch is not None)
+
+    def _close_measure(self, voix, mesures):
+        if not self._mesure[voix]:
+            return
+        if self._attente[voix] is not None:
+            mesures.append((voix, self._attente[voix]))
+        self._attente[voix] = self._mesure[voix]
+        self._mesure[voix] = []
+
+def key_fifths(tonique) -> int:
+    """Armure (quintes, négatif pour les bémols) de la tonalité majeure `tonique`."""
+    lettre, alteration = tonique
+    return KEY_FIFTHS[(LETTER_SEMITONES[lettre] + alteration) % 12]
+
+def musicxml_measure(numero: int, evenements, voix: int, tonique=None) -> str:
+    """XML d'une mesure ; avec `tonique`, ajoute divisions, armure et clef (première mesure)."""
+    morceaux = [f'    <measure number="{numero}">\n']
+    if tonique is not None:
+        signe, ligne, transposition = SATB_VOICES[voix][3]
+        morceaux.append(
+            f'      <attributes><divisions>{MUSICXML_DIVISIONS}</divisions>'
+            f'<key><fifths>{key_fifths(tonique)}</fifths></key>'
+            f'<clef><sign>{signe}</sign><line>{ligne}</line>'
+            + (f'<clef-octave-change>{transposition}</clef-octave-change>' if transposition else '')
+            + '</clef></attributes>\n')
+    for evenement in evenements:
+        if evenement.pitch is None:
+            morceaux.append('      <note><rest/>')
+        else:
+            step, alter, octave, _ = evenement.pitch
+            morceaux.append(f'      <note><pitch><step>{step}</step>'
+                            + (f'<alter>{alter}</alter>' if alter else '')
+                            + f'<octave>{octave}</octave></pitch>')
+        morceaux.append(f'<duration>{evenement.duration}</duration>')
+        if evenement.tie_stop:
+            morceaux.append('<tie type="stop"/>')
+        if evenement.tie_start:
+            morceaux.append('<tie type="start"/>')
+        morceaux.append('<voice>1</voice>')
+        if evenement.duration in MUSICXML_NOTE_TYPES:
+            nom, points = MUSICXML_NOTE_TYPES[evenement.duration]
+            morceaux.append(f'<type>{nom}</type>' + '<dot/>' * points)
+        if evenement.tie_stop or evenement.tie_start:
+            morceaux.append('<notations>'
+                            + ('<tied type="stop"/>' if evenement.tie_stop else '')
+                            + ('<tied type="start"/>' if evenement.tie_start else '')
+                            + '</notations>')
+        morceaux.append('</note>\n')
+    morceaux.append('    </measure>\n')
+    return ''.join(morceaux)
+
+def write_musicxml(pages, titre: str, nom_fichier_sortie: str) -> int:
+    """
+    Écrit une partition MusicXML (score-partwise, quatre parties SATB) à partir
+    d'un flux de pages analysées, (numéro de page, table) comme les produisent
+    iter_analyzed_pages et PageSpool.
+
+    Le XML est produit au fil des mesures, sans arbre en mémoire. Comme le
+    format partwise donne toutes les mesures d'une partie avant la suivante,
+    chaque partie est écrite dans un fichier temporaire, puis les parties sont
+    recopiées l'une après l'autre dans le fichier de sortie.
+    Renvoie le nombre de mesures écrites.
+    """
+    lecteur = SolfaScoreReader()
+    parties = [tempfile.TemporaryFile('w+', encoding='utf-8') for _ in SATB_VOICES]
+    numeros = [0] * len(SATB_VOICES)
+
+    def ecrire(mesures):
+        for voix, evenements in mesures:
+            numeros[voix] += 1
+            tonique = lecteur.tonique if numeros[voix] == 1 else None
+            parties[voix].write(musicxml_measure(numeros[voix], evenements, voix, tonique))
+
+    try:
+        for _, elements, *_ in pages:
+            ecrire(lecteur.feed(elements))
+        ecrire(lecteur.finish())
+
+        with open(nom_fichier_sortie, 'w', encoding='utf-8') as f:
+            f.write('<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
+                    '<!DOCTYPE score-partwise PUBLIC "-//Recordare//DTD MusicXML 4.0 Partwise//EN" '
+                    '"http://www.musicxml.org/dtds/partwise.dtd">\n'
+                    '<score-partwise version="4.0">\n'
+                    f'  <work><work-title>{escape(titre)}</work-title></work>\n'
+                    '  <part-list>\n')
+            for identifiant, nom, _, _ in SATB_VOICES:
+                f.write(f'    <score-part id="{identifiant}"><part-name>{nom}</part-name></score-part>\n')
+            f.write('  </part-list>\n')
+            for voix, partie in enumerate(parties):
+                f.write(f'  <part id="{SATB_VOICES[voix][0]}">\n')
+                if numeros[voix] == 0:
+                    f.write(musicxml_measure(1, [], voix, lecteur.tonique))
+                partie.seek(0)
+                shutil.copyfileobj(partie, f)
+                f.write('  </part>\n')
+            f.write('</score-partwise>\n')
+    finally:
+        for partie in parties:
+            partie.close()
+    return sum(numeros)
+
+def generate_musicxml_from_elements(elements: ElementTable, titre: str,
+                                    nom_fichier_sortie: str = "partition_analyse.musicxml"):
+    """
+    Génère un fichier MusicXML à partir d'une page analysée (ElementTable
+    associée), sur le modèle des générateurs HTML et JSON.
+    """
+    print("Génération du fichier MusicXML...")
+    try:
+        mesures = write_musicxml([(None, elements)], titre, nom_fichier_sortie)
+        print(f"Succès ! Le fichier '{nom_fichier_sortie}' a été créé ({mesures} mesures).")
+    except Exception as e:
+        print(f"Impossible de sauvegarder le fichier MusicXML : {e}")
+
+def detect_tempo(elements: ElementTable):
+    """Tempo (noires par minute) indiqué dans la page, ou None."""
+    if elements.empty:
+        return None
+    ordre = np.argsort(-elements.y, kind='stable')
+    ys = elements.y[ordre]
+    debuts = np.flatnonzero(np.r_[True, ys[1:] != ys[:-1]])
+    for positions in np.split(ordre, debuts[1:]):
+        trouve = TEMPO_RE.search(''.join(elements.text[positions]).replace(' ', '').lower())
+        if trouve:
+            return int(trouve.group(1)) if trouve.group(1) else TEMPO_TERMS[trouve.group(2)]
+    return None
+
+class MidiTrack:
+    """
+    Piste d'un fichier MIDI standard, encodée au fil de l'eau dans un bytearray
+    préalloué (agrandi par doublement) : chaque événement est précédé du temps
+    écoulé depuis le précédent, en ticks, codé en longueur variable.
+    """
+
+    __slots__ = ('donnees', 'taille', 'attente')
+
+    def __init__(self, capacite: int = 4096):
+        self.donnees = bytearray(capacite)
+        self.taille = 0
+        self.attente = 0
+
+    def wait(self, ticks: int):
+        """Avance le temps de la piste avant le prochain événement."""
+        self.attente += ticks
+
+    def event(self, *octets):
+        """Ajoute un événement (statut et données) précédé de son delta."""
+        fin = self.taille + 4 + len(octets)
+        if fin > len(self.donnees):
+            self.donnees.extend(bytes(max(len(self.donnees), fin - len(self.donnees))))
+        donnees = self.donnees
+        position = self.taille
+        delta = self.attente
+        self.attente = 0
+        # Longueur variable : groupes de 7 bits, poids fort en tête, bit 7 = "suite"
+        pile = delta & 0x7F
+        delta >>= 7
+        while delta:
+            pile = (pile << 8) | 0x80 | (delta & 0x7F)
+            delta >>= 7
+        while True:
+            donnees[position] = pile & 0xFF
+            position += 1
+            if not pile & 0x80:
+                break
+            pile >>= 8
+        donnees[position:position + len(octets)] = bytes(octets)
+        self.taille = position + len(octets)
+
+    def meta(self, type_meta: int, contenu: bytes):
+        """Méta-événement (nom de piste, tempo, armure...) ; contenu limité à 127 octets."""
+        contenu = contenu[:127]
+        self.event(0xFF, type_meta, len(contenu), *contenu)
+
+    def chunk(self) -> bytes:
+        """Bloc MTrk complet, fin de piste comprise."""
+        self.meta(0x2F, b'')
+        return b'MTrk' + struct.pack('>I', self.taille) + bytes(self.donnees[:self.taille])
+
+def write_midi(pages, titre: str, nom_fichier_sortie: str, tempo: int = None) -> int:
+    """
+    Écrit un fichier MIDI standard (format 1) à partir d'un flux de pages
+    analysées, (numéro de page, table) comme pour write_musicxml : une piste de conduite (titre, tempo, armure) puis une piste par
+    voix SATB, chacune sur son canal. Les mesures de SolfaScoreReader sont
+    encodées dès qu'elles sont terminées ; les notes liées ne sont frappées
+    qu'une fois. Sans `tempo`, celui de l'en-tête est utilisé (MIDI_DEFAULT_TEMPO
+    à défaut). Renvoie le nombre de notes écrites.
+    """
+    lecteur = SolfaScoreReader()
+    pistes = [MidiTrack() for _ in SATB_VOICES]
+    for canal, (_, nom, _, _) in enumerate(SATB_VOICES):
+        pistes[canal].meta(0x03, nom.encode('utf-8'))
+        pistes[canal].event(0xC0 | canal, MIDI_PROGRAM)
+    notes = 0
+
+    def ecrire(mesures):
+        nonlocal notes
+        for canal, evenements in mesures:
+            piste = pistes[canal]
+            for evenement in evenements:
+                ticks = evenement.duration * MIDI_TICKS_PER_DIVISION
+                if evenement.pitch is None:
+                    piste.wait(ticks)
+                    continue
+                hauteur = min(max(evenement.pitch[3], 0), 127)
+                if not evenement.tie_stop:
+                    piste.event(0x90 | canal, hauteur, MIDI_VELOCITY)
+                    notes += 1
+                piste.wait(ticks)
+                if not evenement.tie_start:
+                    piste.event(0x80 | canal, hauteur, 0)
+
+    for _, elements, *_ in pages:
+        if tempo is None:
+            tempo = detect_tempo(elements)
+        ecrire(lecteur.feed(elements))
+    ecrire(lecteur.finish())
+
+    conduite = MidiTrack(256)
+    conduite.meta(0x03, titre.encode('utf-8'))
+    conduite.meta(0x51, (60_000_000 // (tempo or MIDI_DEFAULT_TEMPO)).to_bytes(3, 'big'))
+    conduite.meta(0x59, bytes((key_fifths(lecteur.tonique) & 0xFF, 0)))
+    with open(nom_fichier_sortie, 'wb') as f:
+        f.write(struct.pack('>4sIHHH', b'MThd', 6, 1, len(pistes) + 1, MIDI_TICKS_PER_BEAT))
+        f.write(conduite.chunk())
+        for piste in pistes:
+            f.write(piste.chunk())
+    return notes
+
+def generate_midi_from_elements(elements: ElementTable, titre: str,
+                                nom_fichier_sortie: str = "partition_analyse.mid"):
+    """Génère un fichier MIDI (une piste par voix) à partir d'une page analysée."""
+    print("Génération du fichier MIDI...")
+    try:
+        notes = write_midi([(None, elements)], titre, nom_fichier_sortie)
+        print(f"Succès ! Le fichier '{nom_fichier_sortie}' a été créé ({notes} notes).")
+    except Exception as e:
+        print(f"Impossible de sauvegarder le fichier MIDI : {e}")
+
+def parse_page_ranges(spec: str) -> list:
+    """
+    Convertit une liste de pages du type "1-3,7,10-" en numéros de pages.
+    Une plage ouverte ("10-") est renvoyée sous la forme (10, None) et
+    complétée plus tard avec le nombre de pages du PDF.
+    Sert de `type=` à argparse : une liste mal formée, une plage inversée
+    ("5-3"), une page nulle ou une liste vide lèvent argparse.ArgumentTypeError.
+    """
+    pages = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start, tiret, end = part.partition('-')
+        try:
+            start = int(start) if start.strip() else 1
+            end = int(end) if end.strip() else None
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"pages invalides : '{part}' (attendu : 1-3,7,10-)")
+        if start < 1 or (end is not None and end < 1):
+            raise argparse.ArgumentTypeError(f"pages invalides : '{part}' (les pages commencent à 1)")
+        if not tiret:
+            pages.append(start)
+        elif end is None:
+            pages.append((start, None))
+        elif end < start:
+            raise argparse.ArgumentTypeError(f"plage inversée : '{part}' (écrire {end}-{start})")
+        else:
+            pages.extend(range(start, end + 1))
+    if not pages:
+        raise argparse.ArgumentTypeError(f"aucune page dans '{spec}'")
+    return pages
+
+def resolve_pages(pages, page_count: int) -> list:
+    """
+    Applique les plages ouvertes au nombre de pages du document et écarte
+    les pages hors limites. `pages=None` signifie toutes les pages.
+    """
+    if pages is None:
+        return list(range(1, page_count + 1))
+    resolved = []
+    for page in pages:
+        if isinstance(page, tuple):
+            resolved.extend(range(page[0], page_count + 1))
+        elif 1 <= page <= page_count:
+            resolved.append(page)
+        else:
+            print(f"Page {page} ignorée : le document n'a que {page_count} pages.")
+    return sorted(set(resolved))
+
+def expand_pdf_paths(motifs) -> list:
+    """
+    Développe les chemins et motifs glob (ex: "../downloads/*.pdf") en une liste
+    triée et sans doublons de fichiers PDF existants.
+    """
+    chemins = []
+    for motif in motifs:
+        trouves = glob.glob(motif) if glob.has_magic(motif) else [motif]
+        for chemin in sorted(trouves):
+            if os.path.isfile(chemin) and chemin.lower().endswith('.pdf') and chemin not in chemins:
+                chemins.append(chemin)
+            elif not glob.has_magic(motif):
+                print(f"Fichier ignoré (introuvable ou pas un .pdf) : {chemin}")
+    return chemins
+
+class StageProfiler:
+    """
+    Instrumentation du pipeline : pour chaque page analysée, temps réel et temps
+    CPU de chaque étape (extraction, fusion, classification, association,
+    écriture des sorties) et compteurs (glyphes, mots, lignes, notes, rythmes,
+    octaves, associations). En option, un profil cProfile des étapes et le pic
+    de mémoire allouée par étape (tracemalloc).
+
+    Actif lorsqu'il est installé par set_profiler ; les étapes sont mesurées
+    par profile_stage et les compteurs ajoutés par profile_count.
+    """
+
+    def __init__(self, cprofile: bool = False, memoire: bool = False):
+        self.pages = []
+        self.courante = None
+        self.profil = cProfile.Profile() if cprofile else None
+        self.memoire = memoire
+        if memoire and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def begin_page(self, pdf_path, page_num):
+        """Les mesures suivantes sont attribuées à cette page."""
+        self.courante = {"pdf": pdf_path, "page": page_num, "etapes": {}, "compteurs": {}}
+        self.pages.append(self.courante)
+
+    def _page(self) -> dict:
+        if self.courante is None:
+            self.begin_page(None, None)
+        return self.courante
+
+    @contextlib.contextmanager
+    def stage(self, nom: str):
+        """Mesure le bloc comme une exécution de l'étape `nom` sur la page courante."""
+        mesure = self._page()["etapes"].setdefault(nom, {"wall_s": 0.0, "cpu_s": 0.0, "appels": 0})
+        if self.memoire:
+            tracemalloc.reset_peak()
+            memoire_depart = tracemalloc.get_traced_memory()[0]
+        if self.profil is not None:
+            self.profil.enable()
+        debut, debut_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            mesure["wall_s"] += time.perf_counter() - debut
+            mesure["cpu_s"] += time.process_time() - debut_cpu
+            mesure["appels"] += 1
+            if self.profil is not None:
+                self.profil.disable()
+            if self.memoire:
+                pic = (tracemalloc.get_traced_memory()[1] - memoire_depart) / 1024
+                mesure["pic_memoire_ko"] = max(mesure.get("pic_memoire_ko", 0.0), round(pic, 1))
+
+    def count(self, nom: str, nombre: int):
+        compteurs = self._page()["compteurs"]
+        compteurs[nom] = compteurs.get(nom, 0) + int(nombre)
+
+    def take_pages(self) -> list:
+        """Retire et renvoie les mesures des pages (pour les renvoyer d'un processus de travail)."""
+        pages, self.pages, self.courante = self.pages, [], None
+        return pages
+
+    def merge(self, pages: list):
+        """Ajoute les mesures de pages prises dans un autre processus."""
+        self.pages.extend(pages)
+
+    def report(self, nb_fonctions: int = 30) -> dict:
+        """
+        Rapport : totaux par étape, compteurs, mesures de chaque page, pages les
+        plus lentes et, avec cProfile, les fonctions au temps cumulé le plus long.
+        """
+        etapes, compteurs, durees = {}, {}, []
+        for page in self.pages:
+            for nom, mesure in page["etapes"].items():
+                total = etapes.setdefault(nom, {"wall_s": 0.0, "cpu_s": 0.0, "appels": 0})
+                for champ in ("wall_s", "cpu_s", "appels"):
+                    total[champ] += mesure[champ]
+            for nom, nombre in page["compteurs"].items():
+                compteurs[nom] = compteurs.get(nom, 0) + nombre
+            etape_max = max(page["etapes"].items(), key=lambda e: e[1]["wall_s"], default=(None, None))[0]
+            durees.append({"pdf": page["pdf"], "page": page["page"], "etape_la_plus_lente": etape_max,
+                           "wall_s": sum(m["wall_s"] for m in page["etapes"].values())})
+        rapport = {
+            "etapes": etapes,
+            "compteurs": compteurs,
+            "pages_les_plus_lentes": sorted(durees, key=lambda d: d["wall_s"], reverse=True)[:10],
+            "pages": self.pages,
+        }
+        if self.profil is not None:
+            statistiques = pstats.Stats(self.profil).stats
+            lignes = sorted(statistiques.items(), key=lambda s: s[1][3], reverse=True)[:nb_fonctions]
+            rapport["fonctions"] = [
+                {"fonction": f"{os.path.basename(fichier)}:{ligne}({nom})", "appels": nc,
+                 "propre_s": tt, "cumule_s": ct}
+                for (fichier, ligne, nom), (_, nc, tt, ct, _) in lignes
+            ]
+        return rapport
+
+    def write(self, chemin: str):
+        """Écrit le rapport en JSON (et, avec cProfile, le profil brut dans <chemin>.prof)."""
+        with open(chemin, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+        if self.profil is not None:
+            self.profil.dump_stats(os.path.splitext(chemin)[0] + ".prof")
+
+# Instrumentation active (voir set_profiler), None par défaut : aucune mesure
+PROFILER = None
+
+def set_profiler(profiler):
+    """Installe (ou retire, avec None) l'instrumentation du pipeline."""
+    global PROFILER
+    PROFILER = profiler
+
+def profile_stage(nom: str):
+    """Contexte mesurant l'étape `nom` si une instrumentation est active."""
+    return PROFILER.stage(nom) if PROFILER is not None else contextlib.nullcontext()
+
+def profile_count(nom_etape: str, table: ElementTable):
+    """Ajoute aux compteurs ce que l'étape `nom_etape` a produit dans `table`."""
+    if PROFILER is None:
+        return
+    if nom_etape == 'extraction':
+        PROFILER.count('glyphes', len(table))
+    elif nom_etape == 'fusion':
+        PROFILER.count('mots', len(table))
+    elif nom_etape == 'classification':
+        PROFILER.count('lignes', len(np.unique(table.y)))
+        PROFILER.count('notes', np.count_nonzero(table.type == TYPE_NOTE))
+        PROFILER.count('rythmes', np.count_nonzero(table.type == TYPE_RHYTHM))
+        PROFILER.count('octaves', np.count_nonzero(table.type == TYPE_OCTAVE))
+    elif nom_etape == 'association':
+        PROFILER.count('associations', np.count_nonzero(table.assoc >= 0))
+
+# Graphe des étapes de l'analyse d'une page, dans l'ordre : chacune consomme
+# la table produite par la précédente (la première, la table de glyphes).
+# Le troisième champ liste ce dont dépend le résultat de l'étape : le code
+# source des fonctions et la valeur des constantes entrent dans sa version.
+# Une étape reçoit en plus les options que l'extracteur lui destine
+# (options_etapes) ; la version de l'extracteur est déjà dans la clé des glyphes.
+# undeclared_dependencies vérifie ces listes (voir analyze_batch).
+PIPELINE_STAGES = (
+    ('fusion', merge_glyph_table,
+     (merge_glyph_table, ElementTable, TYPE_ENCODING, MERGE_MAX_DX, MERGE_MAX_DY)),
+    ('classification', classify_elements,
+     (classify_elements, ElementTable, TYPE_ENCODING, NOTE_LINE_RE.pattern, OCTAVE_LINE_RE.pattern,
+      TOKEN_RE.pattern, repr(TOKEN_TYPES), OCTAVE_SIZE_RATIO, musical_lines, MUSIC_LINE_MAX_LYRICS,
+      tuple(sorted(SOLFA_CONTINUATIONS)), repr(SOLFA_ALTERATIONS))),
+    ('association', associate_elements,
+     (associate_elements, associate_indices, ElementTable, TYPE_ENCODING)),
+)
+
+# Ce dont dépend le contenu de chaque fichier de sortie, au même titre que
+# le troisième champ de PIPELINE_STAGES : le générateur, les fonctions et
+# classes qui écrivent réellement le fichier, et leurs constantes (dictionnaires
+# et ensembles sous une forme stable et hachable). Modifier l'un d'eux fait
+# réécrire ce type de sortie malgré le cache (voir write_page_outputs).
+_SOLFA_READER_DEPENDENCIES = (
+    ElementTable, TYPE_ENCODING, OCTAVE_LINE_RE.pattern, detect_key, solfa_pitch, musical_lines, octave_shifts, _partage, _decoupe,
+    SolfaEvent, SolfaScoreReader, key_fifths,
+    repr(SOLFA_TO_STEP), repr(RHYTHM_TO_DURATION), SATB_VOICES, KEY_RE.pattern, STEP_LETTERS,
+    repr(LETTER_SEMITONES), repr(KEY_FIFTHS), repr(SOLFA_ALTERATIONS), tuple(sorted(SOLFA_CONTINUATIONS)),
+    MUSIC_LINE_MAX_LYRICS, SOLFA_CHAR_WIDTH, MUSICXML_DIVISIONS,
+)
+_MUSICXML_DEPENDENCIES = (write_musicxml, musicxml_measure,
+                          repr(MUSICXML_NOTE_TYPES)) + _SOLFA_READER_DEPENDENCIES
+_MIDI_DEPENDENCIES = (write_midi, MidiTrack, detect_tempo, MIDI_TICKS_PER_BEAT, MIDI_TICKS_PER_DIVISION,
+                      MIDI_DEFAULT_TEMPO, MIDI_PROGRAM, MIDI_VELOCITY, repr(TEMPO_TERMS),
+                      TEMPO_RE.pattern) + _SOLFA_READER_DEPENDENCIES
+OUTPUT_DEPENDENCIES = {
+    generate_html_from_dataframe: (generate_html_from_dataframe, ElementTable, TYPE_ENCODING),
+    generate_json_from_dataframe: (generate_json_from_dataframe, write_score_json, score_lines,
+                                   _write_json_array, open_text_output, ElementTable, TYPE_ENCODING),
+    generate_musicxml_from_elements: (generate_musicxml_from_elements,) + _MUSICXML_DEPENDENCIES,
+    write_musicxml: _MUSICXML_DEPENDENCIES,
+    generate_midi_from_elements: (generate_midi_from_elements,) + _MIDI_DEPENDENCIES,
+    write_midi: _MIDI_DEPENDENCIES,
+    write_book_json: (write_book_json, score_lines, _write_json_array, open_text_output,
+                      ElementTable, TYPE_ENCODING),
+    generate_npz_from_elements: (generate_npz_from_elements, write_compact_npz, table_arrays,
+                                 pack_strings, repr(COMPACT_SCHEMA), ElementTable, TYPE_ENCODING),
+    generate_jsonl_from_elements: (generate_jsonl_from_elements, ElementTable, TYPE_ENCODING),
+    generate_viewer_from_elements: (generate_viewer_from_elements, write_viewer,
+                                    VIEWER_PADDING, VIEWER_PAGE_GAP, TYPE_ENCODING),
+    write_viewer: (write_viewer, VIEWER_PADDING, VIEWER_PAGE_GAP, TYPE_ENCODING),
+}
+
+@functools.lru_cache(maxsize=None)
+def stage_version(dependances: tuple) -> str:
+    """
+    Empreinte du code d'une étape : SHA-256 du source de ses fonctions et de la
+    représentation de ses constantes. Modifier l'une d'elles invalide les
+    résultats mémoïsés de cette étape et de toutes les suivantes.
+    """
+    empreinte = hashlib.sha256()
+    for dependance in dependances:
+        if callable(dependance):
+            try:
+                texte = inspect.getsource(dependance)
+            except (OSError, TypeError):
+                texte = dependance.__qualname__
+        else:
+            texte = repr(dependance)
+        empreinte.update(texte.encode('utf-8'))
+        empreinte.update(b'\0')
+    return empreinte.hexdigest()
+
+def _stable_value(valeur):
+    """Forme sous laquelle une constante figure dans une liste de dépendances."""
+    if isinstance(valeur, re.Pattern):
+        return valeur.pattern
+    if isinstance(valeur, (set, frozenset)):
+        return tuple(sorted(valeur))
+    if isinstance(valeur, np.ndarray):
+        return tuple(valeur.tolist())
+    if isinstance(valeur, dict):
+        return repr(valeur)
+    return valeur
+
+def _code_objects(objet):
+    """Objets code d'une fonction (fonctions imbriquées comprises) ou des méthodes d'une classe."""
+    if inspect.isclass(objet):
+        for attribut in vars(objet).values():
+            attribut = getattr(attribut, '__func__', attribut)
+            if isinstance(attribut, property):
+                attribut = attribut.fget
+            if inspect.isfunction(attribut):
+                yield from _code_objects(attribut)
+        return
+    pile = [objet.__code__]
+    while pile:
+        code = pile.pop()
+        yield code
+        pile.extend(c for c in code.co_consts if inspect.iscode(c))
+
+def undeclared_dependencies(dependances: tuple) -> list:
+    """
+    Noms des constantes (en majuscules) et des fonctions ou classes du module
+    lues par les fonctions de `dependances`, ou de proche en proche par celles
+    qu'elles appellent, mais absentes de `dependances` : leur modification ne
+    changerait pas stage_version, et le cache resterait périmé sans le dire.
+    Les constantes sont cherchées par valeur, sous leur forme _stable_value,
+    y compris à l'intérieur des tuples de la liste (TYPE_ENCODING).
+    """
+    module = globals()
+    declarees = set()
+    for dependance in dependances:
+        declarees.add(dependance)
+        if isinstance(dependance, tuple):
+            declarees.update(dependance)
+    manquantes, vues = [], set()
+    a_parcourir = [dependance for dependance in dependances if callable(dependance)]
+    while a_parcourir:
+        for code in _code_objects(a_parcourir.pop()):
+            for nom in code.co_names:
+                if nom not in module or nom in vues:
+                    continue
+                vues.add(nom)
+                valeur = module[nom]
+                if inspect.isfunction(valeur) or inspect.isclass(valeur):
+                    if valeur.__module__ != __name__:
+                        continue
+                    if valeur not in declarees:
+                        manquantes.append(nom)
+                    a_parcourir.append(valeur)
+                elif nom.isupper() and _stable_value(valeur) not in declarees:
+                    manquantes.append(nom)
+    return manquantes
+
+def check_cache_dependencies() -> bool:
+    """
+    Signale les dépendances non déclarées des étapes (PIPELINE_STAGES) et des
+    sorties (OUTPUT_DEPENDENCIES). Renvoie True si les listes sont complètes.
+    """
+    listes = [(f"l'étape {nom}", dependances) for nom, _, dependances in PIPELINE_STAGES]
+    listes += [(f"la sortie {generateur.__name__}", dependances)
+               for generateur, dependances in OUTPUT_DEPENDENCIES.items()]
+    complet = True
+    for libelle, dependances in listes:
+        manquantes = undeclared_dependencies(dependances)
+        if manquantes:
+            complet = False
+            print(f"Attention : dépendances non déclarées pour {libelle} ({', '.join(manquantes)}) ; "
+                  "le cache ne sera pas invalidé si elles changent.")
+    return complet
+
+def stage_key(cle_entree: str, nom: str, dependances: tuple) -> str:
+    """Clé d'un artefact : dérivée de la clé de son entrée, du nom et de la version de l'étape."""
+    texte = f"{cle_entree}|{nom}|{stage_version(dependances)}"
+    return hashlib.sha256(texte.encode('utf-8')).hexdigest()
+
+def analyze_page_incremental(document: PdfDocument, page_num: int):
+    """
+    Version mémoïsée d'analyze_page pour un PdfDocument muni d'un cache.
+
+    Les clés des étapes s'enchaînent à partir de celle des glyphes (SHA-256 du
+    PDF, page, version de l'extracteur) : on repart de la dernière table
+    trouvée dans le cache, et seules les étapes suivantes sont recalculées
+    puis enregistrées. Un PDF inchangé ne refait donc aucun calcul, et une
+    modification de classify_elements ne refait ni l'extraction ni la fusion.
+
+    Renvoie (table finale, clé de cette table) ; la clé vaut None si
+    l'extraction a échoué.
+    """
+    cache = document.cache
+    cles = [document.glyph_key(page_num)]
+    for nom, _, dependances in PIPELINE_STAGES:
+        cles.append(stage_key(cles[-1], nom, dependances))
+
+    depart, table = len(PIPELINE_STAGES), None
+    while depart > 0:
+        table = cache.load_table(cles[depart])
+        if table is not None:
+            break
+        depart -= 1
+    if depart > 0:
+        etapes = ", ".join(nom for nom, _, _ in PIPELINE_STAGES[:depart])
+        print(f"Page {page_num} : étapes reprises depuis le cache ({etapes}).")
+        if PROFILER is not None:
+            PROFILER.count('etapes_en_cache', depart)
+    else:
+        print(f"Extraction du texte et des coordonnées de la page {page_num}...")
+        try:
+            with profile_stage('extraction'):
+                table = document.glyphs(page_num)
+        except Exception as e:
+            print(f"Erreur lors de l'extraction du texte : {e}")
+            return ElementTable.vide(), None
+        profile_count('extraction', table)
+
+    for indice in range(depart, len(PIPELINE_STAGES)):
+        if table.empty:
+            break
+        nom, fonction, _ = PIPELINE_STAGES[indice]
+        print(f"Étape {nom}...")
+        with profile_stage(nom):
+            table = fonction(table, **document.extracteur.options_etapes.get(nom, {}))
+        profile_count(nom, table)
+        cache.save_table(cles[indice + 1], table)
+        depart = indice + 1
+    return table, cles[depart]
+
+def analyze_page(page, page_num: int) -> ElementTable:
+    """
+    Exécute extraction, classification et association sur une page ouverte
+    (page PyPDF2, ou PdfDocument et numéro de page).
+    Les étapes se passent une ElementTable, sans conversion en DataFrame.
+    Renvoie une table vide si la page ne contient pas de texte exploitable.
+    Un PdfDocument avec cache passe par analyze_page_incremental.
+    """
+    if isinstance(page, PdfDocument) and page.cache is not None:
+        return analyze_page_incremental(page, page_num)[0]
+    mots = extract_page_elements(page, page_num)
+    if mots.empty:
+        return mots
+    options = page.extracteur.options_etapes if isinstance(page, PdfDocument) else {}
+    print("Classification et annotation des textes...")
+    with profile_stage('classification'):
+        elements = classify_elements(mots, **options.get('classification', {}))
+    profile_count('classification', elements)
+    print("Classification terminée.")
+    print("Association des symboles aux notes...")
+    with profile_stage('association'):
+        elements = associate_elements(elements)
+    profile_count('association', elements)
+    print("Association terminée.")
+    return elements
+
+def iter_analyzed_pages(document, pages=None, cache: GlyphCache = None,
+                        extracteur: str = DEFAULT_EXTRACTOR):
+    """
+    Générateur : analyse les pages d'un PDF une à une et produit, pour chacune,
+    (numéro de page, ElementTable, clé de la table dans le cache ou None).
+
+    `document` est un PdfDocument ou un chemin (ouvert alors avec `cache` et
+    `extracteur`) ; `pages` suit le format de parse_page_ranges (None : toutes).
+    Toutes les pages passent par le même document ouvert, dont les ressources
+    sont libérées après chaque page : la mémoire reste à peu près constante
+    quel que soit le nombre de pages, tant que le consommateur ne garde pas
+    les tables produites.
+    """
+    if not isinstance(document, PdfDocument):
+        document = PdfDocument(document, cache, extracteur)
+    for page_num in resolve_pages(pages, document.page_count()):
+        if PROFILER is not None:
+            PROFILER.begin_page(document.chemin, page_num)
+        if document.cache is not None:
+            elements, cle = analyze_page_incremental(document, page_num)
+        else:
+            elements, cle = analyze_page(document, page_num), None
+        document.release()
+        yield page_num, elements, cle
+
+def output_basename(pdf_path: str, page_num: int, dossier_sortie: str) -> str:
+    """Chemin de sortie (sans extension) propre à une page d'un PDF."""
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    return os.path.join(dossier_sortie, f"{stem}_page_{page_num:03d}")
+
+def book_basename(pdf_path: str, dossier_sortie: str) -> str:
+    """Chemin de sortie (sans extension) des fichiers d'un document entier (mode --livre)."""
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    return os.path.join(dossier_sortie, f"{stem}_livre")
+
+def analyze_and_write(document: PdfDocument, page_num: int, dossier_sortie: str,
+                      html: bool = True, musicxml: bool = False, midi: bool = False,
+                      compact=(), visionneuse: bool = False):
+    """
+    Analyse une page d'un PDF et écrit ses fichiers de sortie.
+    Renvoie le chemin du JSON écrit, ou None si la page est vide.
+    """
+    if PROFILER is not None:
+        PROFILER.begin_page(document.chemin, page_num)
+    if document.cache is not None:
+        elements, cle = analyze_page_incremental(document, page_num)
+    else:
+        elements, cle = analyze_page(document, page_num), None
+    return write_page_outputs(document, page_num, elements, cle, dossier_sortie,
+                              html, musicxml, midi, compact, visionneuse)
+
+def write_page_outputs(document: PdfDocument, page_num: int, df_final: ElementTable, cle,
+                       dossier_sortie: str, html: bool = True, musicxml: bool = False,
+                       midi: bool = False, compact=(), visionneuse: bool = False):
+    """
+    Écrit les fichiers de sortie d'une page déjà analysée (par exemple produite
+    par iter_analyzed_pages). Renvoie le chemin du JSON écrit, ou None si la
+    page est vide. `compact` liste les formats compacts à écrire en plus
+    (clés de COMPACT_WRITERS). `visionneuse` ajoute la visionneuse légère
+    `<base>_visionneuse.html` et ses données `<base>_visionneuse.data.js`.
+
+    Avec un cache et la clé `cle` de la table, l'écriture est elle aussi
+    mémoïsée : un fichier de sortie n'est pas régénéré s'il existe et a déjà été
+    produit à partir de la même table finale par la même version du générateur
+    et des fonctions qui l'écrivent (OUTPUT_DEPENDENCIES).
+    """
+    pdf_path = document.chemin
+    pdf_title = os.path.basename(pdf_path)
+    cache = document.cache
+    if df_final.empty:
+        print(f"Page {page_num} de {pdf_title} ignorée : aucun texte exploitable.")
+        return None
+    base = output_basename(pdf_path, page_num, dossier_sortie)
+    titre = f"{pdf_title} - page {page_num}"
+    sorties = [(generate_html_from_dataframe, base + ".html")] if html else []
+    if visionneuse:
+        sorties.append((generate_viewer_from_elements, base + "_visionneuse.html"))
+    sorties.append((generate_json_from_dataframe, base + ".json"))
+    if musicxml:
+        sorties.append((generate_musicxml_from_elements, base + ".musicxml"))
+    if midi:
+        sorties.append((generate_midi_from_elements, base + ".mid"))
+    for extension in compact:
+        sorties.append((COMPACT_WRITERS[extension], f"{base}.{extension}"))
+    for generateur, fichier in sorties:
+        marque = None
+        if cle is not None:
+            marque = stage_key(cle, f"{os.path.abspath(fichier)}|{titre}",
+                               OUTPUT_DEPENDENCIES.get(generateur, (generateur,)))
+            if cache.has_stamp(marque) and os.path.exists(fichier):
+                print(f"{fichier} est à jour.")
+                continue
+        with profile_stage(fichier[len(base) + 1:]):
+            generateur(df_final, titre, fichier)
+        if marque is not None:
+            cache.put_stamp(marque)
+    return base + ".json"
+
+def write_book_outputs(pdf_path: str, recueil: PageSpool, dossier_sortie: str,
+                       musicxml: bool = False, midi: bool = False, visionneuse: bool = False,
+                       cache: GlyphCache = None):
+    """
+    Écrit les fichiers d'un document entier (mode --livre) à partir de ses pages
+    analysées, mises de côté dans `recueil` : `<pdf>_livre.json`
+    (write_book_json) et, avec `musicxml` et `midi`, une seule partition
+    `<pdf>_livre.musicxml` et un seul fichier `<pdf>_livre.mid` dont les
+    mesures se suivent d'une page à l'autre (un chant qui passe la page n'est
+    pas coupé en deux partitions). Avec `visionneuse`, une seule visionneuse
+    `<pdf>_livre_visionneuse.html` empile toutes les pages du document.
+    Chaque écrivain relit les pages en flux.
+
+    Avec un cache, et si toutes les pages y ont une clé, l'écriture est
+    mémoïsée comme dans write_page_outputs : la marque dérive des clés de
+    toutes les pages et des dépendances de l'écrivain (OUTPUT_DEPENDENCIES).
+    Renvoie le chemin du JSON écrit, ou None si aucune page n'a de contenu.
+    """
+    pdf_title = os.path.basename(pdf_path)
+    if not recueil.pages:
+        print(f"{pdf_title} : aucune page exploitable, pas de fichiers pour le document entier.")
+        return None
+    base = book_basename(pdf_path, dossier_sortie)
+    sorties = [(write_book_json, base + ".json")]
+    if musicxml:
+        sorties.append((write_musicxml, base + ".musicxml"))
+    if midi:
+        sorties.append((write_midi, base + ".mid"))
+    if visionneuse:
+        sorties.append((write_viewer, base + "_visionneuse.html"))
+    cles = recueil.keys()
+    cle = None
+    if cache is not None and all(cles):
+        cle = hashlib.sha256("|".join(cles).encode('utf-8')).hexdigest()
+    for ecrivain, fichier in sorties:
+        marque = None
+        if cle is not None:
+            marque = stage_key(cle, f"{os.path.abspath(fichier)}|{pdf_title}", OUTPUT_DEPENDENCIES[ecrivain])
+            if cache.has_stamp(marque) and os.path.exists(fichier):
+                print(f"{fichier} est à jour.")
+                continue
+        print(f"Génération de {fichier} ({len(recueil.pages)} page(s))...")
+        try:
+            ecrivain(recueil, pdf_title, fichier)
+        except Exception as e:
+            print(f"Impossible d'écrire {fichier} : {e}")
+            continue
+        print(f"Succès ! Le fichier '{fichier}' a été créé.")
+        if marque is not None:
+            cache.put_stamp(marque)
+    return base + ".json"
+
+# Dernier document PDF ouvert dans un processus de travail : les tâches
+# arrivent groupées par fichier, un seul document suffit
+_worker_document = None
+
+def _worker_open(pdf_path: str, cache: GlyphCache, extracteur: str) -> PdfDocument:
+    """
+    Document `pdf_path` du processus de travail, ouvert une seule fois pour
+    toutes ses pages ; le document précédent est fermé quand le fichier change,
+    pour que la mémoire d'un processus ne croisse pas avec le nombre de PDF.
+    """
+    global _worker_document
+    if _worker_document is None or _worker_document.chemin != pdf_path:
+        if _worker_document is not None:
+            _worker_document.close()
+            _worker_document = None
+        _worker_document = PdfDocument(pdf_path, cache, extracteur)
+    return _worker_document
+
+def _analyze_page_task(task):
+    """
+    Tâche exécutée dans un processus du pool : chaque processus garde le
+    document en cours ouvert (_worker_open) pour ne décoder qu'une fois la
+    structure de chaque PDF.
+    Renvoie (JSON écrit, mesures, page) : avec `profilage` (options de
+    StageProfiler), les mesures de la page, que le processus principal ajoute
+    à son rapport ; avec `livre`, la table analysée et sa clé.
+    """
+    (pdf_path, page_num, dossier_sortie, html, musicxml, midi, compact, visionneuse,
+     cache, extracteur, profilage, livre) = task
+    document = _worker_open(pdf_path, cache, extracteur)
+    if profilage is not None and PROFILER is None:
+        set_profiler(StageProfiler(**profilage))
+    page = None
+    if livre:
+        # La table revient au processus principal, qui la met de côté pour
+        # les fichiers du document entier
+        _, elements, cle = next(iter_analyzed_pages(document, [page_num]))
+        fichier = write_page_outputs(document, page_num, elements, cle, dossier_sortie,
+                                     html, musicxml, midi, compact, visionneuse)
+        page = (elements, cle)
+    else:
+        fichier = analyze_and_write(document, page_num, dossier_sortie,
+                                    html, musicxml, midi, compact, visionneuse)
+    return fichier, (PROFILER.take_pages() if profilage is not None else []), page
+
+def analyze_batch(pdf_paths, pages=None, dossier_sortie: str = ".", html: bool = True,
+                  musicxml: bool = False, midi: bool = False, compact=(), visionneuse: bool = False,
+                  workers: int = 1, cache: GlyphCache = None,
+                  extracteur: str = DEFAULT_EXTRACTOR, livre: bool = False) -> list:
+    """
+    Analyse plusieurs pages de plusieurs PDF en une seule exécution.
+    Chaque PDF n'est ouvert qu'une fois (un seul à la fois, pages lues en flux
+    par iter_analyzed_pages), et chaque page produit ses propres
+    fichiers `<pdf>_page_NNN.json` (et `.html`, `.musicxml`, `.mid`, et les
+    formats compacts `.npz`/`.jsonl` demandés par `compact`, la visionneuse
+    `_visionneuse.html`) dans `dossier_sortie`.
+
+    Avec `workers` > 1, les pages (de tous les PDF) sont réparties sur un
+    ProcessPoolExecutor ; la liste renvoyée suit toujours l'ordre des
+    fichiers puis des pages, quel que soit l'ordre de fin des processus.
+
+    Avec un `cache`, les glyphes extraits et les tables de chaque étape sont
+    conservés sur disque : seules les étapes dont l'entrée ou le code a changé
+    sont recalculées (voir analyze_page_incremental).
+
+    `extracteur` choisit le moteur d'extraction des glyphes (voir EXTRACTORS).
+
+    Avec `livre`, chaque PDF produit aussi les fichiers de son document entier
+    (write_book_outputs), à partir des mêmes pages analysées, mises de côté
+    sur disque (PageSpool).
+
+    Si une instrumentation est active (set_profiler), chaque page y est mesurée,
+    y compris dans les processus de travail ; leur profil cProfile n'est en
+    revanche pas rapatrié.
+
+    Renvoie la liste des fichiers JSON écrits.
+    """
+    os.makedirs(dossier_sortie, exist_ok=True)
+    if cache is not None:
+        check_cache_dependencies()
+    resultats = []
+    taches = []
+    profilage = None
+    if PROFILER is not None:
+        profilage = {"cprofile": False, "memoire": PROFILER.memoire}
+    for pdf_path in pdf_paths:
+        try:
+            document = PdfDocument(pdf_path, cache, extracteur)
+            numeros = resolve_pages(pages, document.page_count())
+        except Exception as e:
+            print(f"Impossible d'ouvrir {pdf_path} : {e}")
+            continue
+        if workers > 1:
+            document.close()
+            taches.extend((pdf_path, page_num, dossier_sortie, html, musicxml, midi, compact,
+                           visionneuse, cache, extracteur, profilage, livre) for page_num in numeros)
+            continue
+        # Un seul document ouvert à la fois, et chaque page est écrite au fil
+        # du flux : la mémoire ne dépend ni du nombre de pages ni de fichiers.
+        recueil = PageSpool() if livre else None
+        try:
+            for page_num, elements, cle in iter_analyzed_pages(document, numeros):
+                resultats.append(write_page_outputs(document, page_num, elements, cle,
+                                                    dossier_sortie, html, musicxml, midi, compact,
+                                                    visionneuse))
+                if recueil is not None and not elements.empty:
+                    recueil.add(page_num, elements, cle)
+            document.close()
+            if recueil is not None:
+                write_book_outputs(pdf_path, recueil, dossier_sortie, musicxml, midi,
+                                   visionneuse, cache)
+        finally:
+            if recueil is not None:
+                recueil.close()
+
+    if taches:
+        # Les résultats arrivent dans l'ordre des tâches, donc groupés par
+        # fichier : le recueil d'un PDF est complet dès que le fichier change
+        recueil, recueil_pdf = None, None
+        with contextlib.ExitStack() as pile:
+            if len(taches) > 1:
+                pool = pile.enter_context(ProcessPoolExecutor(max_workers=workers))
+                sorties = pool.map(_analyze_page_task, taches)
+            else:
+                sorties = map(_analyze_page_task, taches)
+            for tache, (fichier, mesures, page) in zip(taches, sorties):
+                resultats.append(fichier)
+                if PROFILER is not None:
+                    PROFILER.merge(mesures)
+                if page is None:
+                    continue
+                if tache[0] != recueil_pdf:
+                    if recueil is not None:
+                        write_book_outputs(recueil_pdf, recueil, dossier_sortie, musicxml, midi,
+                                           visionneuse, cache)
+                        recueil.close()
+                    recueil, recueil_pdf = pile.enter_context(contextlib.closing(PageSpool())), tache[0]
+                if not page[0].empty:
+                    recueil.add(tache[1], *page)
+            if recueil is not None:
+                write_book_outputs(recueil_pdf, recueil, dossier_sortie, musicxml, midi,
+                                   visionneuse, cache)
+    return [fichier for fichier in resultats if fichier]
+
+def main_batch(argv=None):
+    """
+    Point d'entrée non interactif :
+        python parsepdf.py FICHIERS... [--pages 1-3,7] [--sortie DOSSIER] [--sans-html] [--musicxml]
+                           [--midi] [--compact npz|jsonl] [--visionneuse] [--workers N]
+                           [--cache [DOSSIER]] [--extracteur pypdf2|pymupdf] [--livre]
+                           [--profil RAPPORT.json [--cprofile] [--tracemalloc]]
+    """
+    parser = argparse.ArgumentParser(description="Analyse par lot de partitions Tonic Solfa en PDF.")
+    parser.add_argument("fichiers", nargs="+", help="fichiers PDF ou motifs glob")
+    parser.add_argument("--pages", type=parse_page_ranges,
+                        help="pages à analyser, ex: 1-3,7,10- (défaut : toutes)")
+    parser.add_argument("--sortie", default="analyses", help="dossier des fichiers produits")
+    parser.add_argument("--sans-html", action="store_true", help="ne pas générer les fichiers HTML")
+    parser.add_argument("--musicxml", action="store_true",
+                        help="générer aussi une partition MusicXML (4 voix SATB) par page")
+    parser.add_argument("--midi", action="store_true",
+                        help="générer aussi un fichier MIDI (une piste par voix) par page")
+    parser.add_argument("--compact", action="append", choices=sorted(COMPACT_WRITERS), default=[],
+                        help="écrire aussi la page dans un format compact : npz (colonnes NumPy "
+                             "compressées) ou jsonl (un élément par ligne) ; répétable")
+    parser.add_argument("--visionneuse", action="store_true",
+                        help="générer aussi une visionneuse légère par page (HTML + données .data.js)")
+    parser.add_argument("--livre", action="store_true",
+                        help="écrire aussi, pour chaque PDF, les fichiers du document entier : "
+                             "<pdf>_livre.json (toutes les pages analysées) et, avec --musicxml, --midi ou "
+                             "--visionneuse, une seule partition, un seul MIDI ou une seule visionneuse")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="nombre de processus pour analyser les pages en parallèle (défaut : 1)")
+    parser.add_argument("--cache", nargs="?", const=DEFAULT_CACHE_DIR, metavar="DOSSIER",
+                        help="garder sur disque les glyphes et les résultats de chaque étape, et ne pas "
+                             f"réécrire les sorties à jour (défaut : {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--extracteur", choices=sorted(EXTRACTORS), default=DEFAULT_EXTRACTOR,
+                        help=f"moteur d'extraction des glyphes (défaut : {DEFAULT_EXTRACTOR} ; "
+                             "pymupdf, plus rapide, nécessite PyMuPDF)")
+    parser.add_argument("--cache-max-mo", type=int, default=DEFAULT_CACHE_SIZE // (1024 * 1024),
+                        help="taille maximale du cache en Mo")
+    parser.add_argument("--profil", metavar="RAPPORT",
+                        help="mesurer chaque étape de chaque page (temps réel, CPU, compteurs) "
+                             "et écrire le rapport JSON dans RAPPORT")
+    parser.add_argument("--cprofile", action="store_true",
+                        help="avec --profil : profiler les étapes avec cProfile (RAPPORT.prof)")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="avec --profil : mesurer le pic de mémoire allouée par étape")
+    args = parser.parse_args(argv)
+
+    pdf_paths = expand_pdf_paths(args.fichiers)
+    if not pdf_paths:
+        print("Aucun fichier PDF à analyser.")
+        return
+    pages = args.pages
+    if args.extracteur == PyMuPDFExtractor.nom and pymupdf is None:
+        print("L'extracteur pymupdf nécessite PyMuPDF : pip install pymupdf")
+        return
+    cache = GlyphCache(args.cache, args.cache_max_mo * 1024 * 1024) if args.cache else None
+    if args.profil:
+        set_profiler(StageProfiler(cprofile=args.cprofile, memoire=args.tracemalloc))
+    fichiers = analyze_batch(pdf_paths, pages, args.sortie, html=not args.sans_html, musicxml=args.musicxml,
+                             midi=args.midi, compact=tuple(args.compact), visionneuse=args.visionneuse,
+                             workers=args.workers, cache=cache, extracteur=args.extracteur,
+                             livre=args.livre)
+    print(f"Analyse terminée : {len(fichiers)} page(s) analysée(s) dans {len(pdf_paths)} fichier(s).")
+    if args.profil:
+        try:
+            PROFILER.write(args.profil)
+            print(f"Rapport de profilage écrit dans '{args.profil}'.")
+        except Exception as e:
+            print(f"Impossible d'écrire le rapport de profilage : {e}")
+        set_profiler(None)
+
 def main():
     """
     Fonction principale qui demande les informations à l'utilisateur.
@@ -454,18 +2701,22 @@ def main():
 
     pdf_title = os.path.basename(pdf_path)
 
-    df_coords = extract_text_with_coordinates(pdf_path, page_num)
+    try:
+        page = PdfReader(pdf_path).pages[page_num - 1]
+        elements = analyze_page(page, page_num)
+    except Exception as e:
+        print(f"Erreur lors de l'extraction du texte : {e}")
+        elements = ElementTable.vide()
     
-    if df_coords.empty:
+    if elements.empty:
         print("L'analyse a échoué. Fin du programme.")
         return
 
-    df_classified = classify_and_annotate_text(df_coords)
-    
-    df_final = associate_symbols_to_notes(df_classified)
-
-    generate_html_from_dataframe(df_final, pdf_title)
-    generate_json_from_dataframe(df_final, pdf_title)
+    generate_html_from_dataframe(elements, pdf_title)
+    generate_json_from_dataframe(elements, pdf_title)
 
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 1:
+        main_batch()
+    else:
+        main()